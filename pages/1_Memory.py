@@ -1,58 +1,43 @@
-import sqlite3
-from datetime import date
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 import streamlit as st
 import matplotlib.pyplot as plt
 import pandas as pd
-from groq import Groq
+from smriti.gateway import get_gateway, provider_ready
+from smriti.progress_store import (
+    days_since, init_progress_db, insert_progress, latest_feedback, progress_totals, recent_days, recent_weeks,
+    store_feedback, summary_fingerprint
+)
+from smriti.ui import current_user
 
 # ---------------------------
-# GROQ SETUP (CORRECT)
+# LLM GATEWAY
 # ---------------------------
-groq_api_key = st.secrets.get("GROQ_API_KEY")
-if not groq_api_key:
+if not provider_ready():
     st.error("GROQ_API_KEY not found in secrets.toml")
     st.stop()
 
-client = Groq(api_key=groq_api_key)
+llm = get_gateway()
 
 # ---------------------------
 # DATABASE
 # ---------------------------
-def get_connection():
-    return sqlite3.connect("memory.db")
-
-def init_db():
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS progress(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            day TEXT,
-            planned_hours INTEGER,
-            worked_hours INTEGER,
-            task TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-init_db()
-
-def insert_progress(day, planned, worked, task):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO progress (day, planned_hours, worked_hours, task) VALUES (?, ?, ?, ?)",
-        (day, planned, worked, task)
-    )
-    conn.commit()
-    conn.close()
+TREND_DAYS = 3
+SUMMARY_WEEKS = 8
+CHART_WINDOWS = {
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "Last 365 days": 365,
+    "All time": None,
+}
+# Spans longer than these (in days) are drawn as weekly, then monthly, bars.
+DAILY_MAX_DAYS = 45
+WEEKLY_MAX_DAYS = 240
+MAX_TICK_LABELS = 12
 
-def fetch_all():
-    conn = get_connection()
-    data = conn.execute("SELECT * FROM progress").fetchall()
-    conn.close()
-    return data
+init_progress_db()
 
 # ---------------------------
 # STYLES
@@ -99,7 +84,7 @@ st.markdown("""
 # ---------------------------
 # GROQ FEEDBACK AGENT (FIXED)
 # ---------------------------
-def feedback_agent(summary: str) -> str:
+def feedback_agent(summary: str, stream: bool = False):
     prompt = f"""
 You are a productivity feedback agent.
 
@@ -113,19 +98,105 @@ Give the following with proper labels:
 4. Suggested plan for next 3 days
 5. 2 simple productivity tips
 """
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": "You are a helpful productivity coach."},
-            {"role": "user", "content": prompt}
-        ]
+    return llm.complete(
+        prompt,
+        "You are a helpful productivity coach.",
+        site="memory.feedback_agent",
+        stream=stream
+    )
+
+# Feedback for a (user, aggregates, day) is generated once, in the background,
+# as soon as the page sees aggregates or a day it has no feedback for. Until
+# then the last feedback for the same aggregates stays on screen.
+class FeedbackRefresher:
+    def __init__(self, max_workers=2):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feedback")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def job(self, key):
+        with self.lock:
+            return self.jobs.get(key)
+
+    def refresh(self, key, summary):
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is None or job.done():
+                self.jobs = {k: j for k, j in self.jobs.items() if not j.done()}
+                job = self.jobs[key] = self.pool.submit(self._generate, key, summary)
+            return job
+
+    def _generate(self, key, summary):
+        user_id, fingerprint, day = key
+        feedback = feedback_agent(summary)
+        store_feedback(fingerprint, day, feedback, user_id=user_id)
+        return feedback
+
+@st.cache_resource
+def get_feedback_refresher():
+    return FeedbackRefresher()
+
+@st.fragment(run_every=2)
+def feedback_progress(job):
+    if job.done():
+        st.rerun()
+    st.caption("⏳ Updating feedback for your current progress...")
+
+# ---------------------------
+# PROGRESS CHART
+# ---------------------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def progress_chart(user_id, version, start):
+    """Render the planned vs worked chart as PNG bytes; returns ``(png, bucket label)``."""
+    df = pd.DataFrame(days_since(start, user_id), columns=["day", "planned_hours", "worked_hours", "backlog"])
+    if df.empty:
+        return None, None
+    df["day"] = pd.to_datetime(df["day"])
+    span = (df["day"].iloc[-1] - df["day"].iloc[0]).days
+    if span <= DAILY_MAX_DAYS:
+        bucket, label_format = "Daily", "%Y-%m-%d"
+        data = df.set_index("day")
+    else:
+        weekly = span <= WEEKLY_MAX_DAYS
+        bucket, label_format = ("Weekly", "%d %b") if weekly else ("Monthly", "%b %Y")
+        rule = "W-MON" if weekly else "MS"
+        data = df.set_index("day").resample(rule, label="left", closed="left").sum()
+
+    fig, ax = plt.subplots()
+    x = range(len(data))
+    width = 0.35
+
+    ax.bar(
+        [i - width / 2 for i in x],
+        data["planned_hours"],
+        width=width,
+        label="Planned"
     )
-    return response.choices[0].message.content
+    ax.bar(
+        [i + width / 2 for i in x],
+        data["worked_hours"],
+        width=width,
+        label="Worked"
+    )
+
+    step = max(1, -(-len(data) // MAX_TICK_LABELS))
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Hours")
+    ax.set_xticks(list(x)[::step])
+    ax.set_xticklabels(data.index[::step].strftime(label_format), rotation=45)
+    ax.legend()
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=120)
+    plt.close(fig)
+    return buffer.getvalue(), bucket
 
 # ---------------------------
 # UI
 # ---------------------------
 st.title("Memory Productivity Agent 🧠")
+user_id = current_user()
 st.header("Daily Progress Check-in 📚")
 
 with st.form("daily_form"):
@@ -136,24 +207,18 @@ with st.form("daily_form"):
     submit = st.form_submit_button("Save Progress")
 
 if submit:
-    insert_progress(str(today), planned, worked, task)
+    insert_progress(str(today), planned, worked, task, user_id=user_id)
     st.success("Progress saved successfully! ✅")
 
 # ---------------------------
 # DATA ANALYSIS
 # ---------------------------
-data = fetch_all()
-if not data:
+totals = progress_totals(user_id)
+if not totals["entries"]:
     st.info("No data yet. Start logging your progress.")
     st.stop()
 
-df = pd.DataFrame(
-    data,
-    columns=["id", "day", "planned_hours", "worked_hours", "task"]
-)
-
-df["backlog"] = (df["planned_hours"] - df["worked_hours"]).clip(lower=0)
-total_backlog = df["backlog"].sum()
+total_backlog = totals["backlog"]
 
 if total_backlog <= 2:
     status = "On track"
@@ -162,10 +227,15 @@ elif total_backlog <= 6:
 else:
     status = "Critical"
 
+df = pd.DataFrame(
+    recent_days(TREND_DAYS, user_id),
+    columns=["day", "planned_hours", "worked_hours", "backlog"]
+)
+
 trend = (
     "Improving"
-    if df["worked_hours"].tail(3).mean()
-    > df["planned_hours"].tail(3).mean()
+    if df["worked_hours"].tail(TREND_DAYS).mean()
+    > df["planned_hours"].tail(TREND_DAYS).mean()
     else "Declining"
 )
 
@@ -185,10 +255,31 @@ Performance status: {status}
 # ---------------------------
 st.header("🤖 Feedback Agent")
 
-if st.button("Get Feedback"):
-    with st.spinner("Generating feedback..."):
-        feedback = feedback_agent(summary)
+fingerprint = summary_fingerprint(summary)
+feedback_key = (user_id, fingerprint, date.today().isoformat())
+latest = latest_feedback(fingerprint, user_id=user_id)
+feedback = latest[1] if latest else None
+refresher = get_feedback_refresher()
+job = refresher.job(feedback_key)
+# A failed job is not retried on every rerun; the button below takes over.
+if (latest is None or latest[0] != feedback_key[2]) and job is None:
+    job = refresher.refresh(feedback_key, summary)
+
+running = job is not None and not job.done()
+if feedback is not None:
     st.markdown(feedback)
+    if running:
+        feedback_progress(job)
+    else:
+        st.caption("⚡ Saved feedback for your current progress — it updates after your next check-in.")
+elif running:
+    feedback_progress(job)
+else:
+    if job is not None and job.exception() is not None:
+        st.warning("⚠️ Could not update feedback in the background. Try again below.")
+    if st.button("Get Feedback"):
+        feedback = st.write_stream(feedback_agent(summary, stream=True))
+        store_feedback(fingerprint, feedback_key[2], feedback, user_id=user_id)
 
 # ---------------------------
 # AI ADVICE
@@ -210,30 +301,21 @@ else:
 # ---------------------------
 st.header("Progress Visualization 📊")
 
-df["day"] = pd.to_datetime(df["day"])
-df = df.sort_values("day")
-
-fig, ax = plt.subplots()
-x = range(len(df))
-width = 0.35
-
-ax.bar(
-    [i - width / 2 for i in x],
-    df["planned_hours"],
-    width=width,
-    label="Planned"
-)
-ax.bar(
-    [i + width / 2 for i in x],
-    df["worked_hours"],
-    width=width,
-    label="Worked"
+window = CHART_WINDOWS[st.radio("Window", list(CHART_WINDOWS), horizontal=True)]
+start = (date.today() - timedelta(days=window)).isoformat() if window else None
+# The entry count only grows on insert, so it versions the cached chart.
+chart, bucket = progress_chart(user_id, totals["entries"], start)
+if chart is None:
+    st.info("No check-ins in this window.")
+else:
+    st.caption(f"{bucket} totals")
+    st.image(chart)
+
+st.subheader("Weekly Totals")
+st.dataframe(
+    pd.DataFrame(
+        recent_weeks(SUMMARY_WEEKS, user_id),
+        columns=["Week of", "Planned Hours", "Worked Hours", "Backlog"]
+    ),
+    hide_index=True
 )
-
-ax.set_xlabel("Date")
-ax.set_ylabel("Hours")
-ax.set_xticks(x)
-ax.set_xticklabels(df["day"].dt.strftime("%Y-%m-%d"), rotation=45)
-ax.legend()
-
-st.pyplot(fig)
@@ -1,91 +1,36 @@
 import streamlit as st
-import pdfplumber
-from groq import Groq
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from smriti.budget import join_pages
+from smriti.doc_cache import document_hash
+from smriti.gateway import get_gateway, provider_ready
+from smriti.syllabus import ANALYSES, analyze
+from smriti.ui import read_pdf_pages
 
 # ---------------------------
-# GROQ SETUP
+# LLM GATEWAY
 # ---------------------------
-groq_api_key = st.secrets.get("GROQ_API_KEY")
-if not groq_api_key:
+if not provider_ready():
     st.error("GROQ_API_KEY not found in secrets.toml")
     st.stop()
 
-client = Groq(api_key=groq_api_key)
+llm = get_gateway()
 
 # ---------------------------
 # PDF TEXT EXTRACTION
 # ---------------------------
 def load_pdf(uploaded_file):
-    text = ""
-    with pdfplumber.open(uploaded_file) as pdf:
-        for page in pdf.pages:
-            extracted = page.extract_text()
-            if extracted:
-                text += extracted + "\n"
-    return text
+    return join_pages(read_pdf_pages(uploaded_file))
 
 # ---------------------------
-# GROQ HELPERS (NO LANGCHAIN)
+# FULL ANALYSIS (CONCURRENT)
 # ---------------------------
-def groq_call(prompt):
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": "You are an academic syllabus analysis assistant."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
-
-def extract_topics(text):
-    prompt = f"""
-From the syllabus text below:
-- Identify subjects
-- List important topics chapter-wise
-- Present output as a clean markdown table
-
-SYLLABUS:
-{text}
-"""
-    return groq_call(prompt)
-
-def suggest_resources(text):
-    prompt = f"""
-Based on the following syllabus:
-- Suggest best books
-- Paid & free online courses
-- Trusted YouTube channels (academic only)
-
-SYLLABUS:
-{text}
-"""
-    return groq_call(prompt)
-
-def give_tips(text):
-    prompt = f"""
-Based on the syllabus below:
-- Give subject-wise study tips
-- Explain how each subject helps in placements
-
-SYLLABUS:
-{text}
-"""
-    return groq_call(prompt)
-
-def generate_study_plan(text):
-    prompt = f"""
-Create a WEEK-WISE study plan in a markdown table.
-
-Rules:
-1. Leave 1 week for mid-sem after half syllabus
-2. Leave 1 week for end-sem after full syllabus
-3. Prioritize important topics
-4. Distribute topics evenly
-
-SYLLABUS:
-{text}
-"""
-    return groq_call(prompt)
+# Prompts live in smriti.syllabus so the batch CLI can pre-warm the response cache.
+def run_full_analysis(text):
+    """Run all four analyses at once and yield ``(name, result)`` as each finishes."""
+    with ThreadPoolExecutor(max_workers=len(ANALYSES)) as pool:
+        futures = {pool.submit(analyze, llm, name, text): name for name in ANALYSES}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
 # ---------------------------
 # UI STYLES
@@ -129,11 +74,18 @@ uploaded_pdf = st.file_uploader(
 )
 
 if uploaded_pdf:
-    with st.spinner("Extracting syllabus..."):
-        syllabus_text = load_pdf(uploaded_pdf)
+    syllabus_text = load_pdf(uploaded_pdf)
 
     st.success("Syllabus processed successfully! ✅")
 
+    doc_hash = document_hash(uploaded_pdf.getvalue())
+    if st.session_state.get("analysis_doc") != doc_hash:
+        st.session_state["analysis_doc"] = doc_hash
+        st.session_state["analysis"] = {}
+    analysis = st.session_state["analysis"]
+
+    full_analysis = st.button("🚀 Run Full Analysis", use_container_width=True)
+
     tab1, tab2, tab3, tab4 = st.tabs([
         "📚 Important Topics",
         "🎯 Resources",
@@ -141,31 +93,53 @@ if uploaded_pdf:
         "📅 Study Plan"
     ])
 
+    # Each tab renders into a slot so full-analysis results can land in any order.
+    slots = {}
+
     with tab1:
         st.subheader("📚 Important Topics")
-        if st.button("Extract Topics"):
-            with st.spinner("Analyzing syllabus..."):
-                topics = extract_topics(syllabus_text)
-            st.markdown(topics)
+        clicked = st.button("Extract Topics")
+        slots["topics"] = st.empty()
+        if clicked:
+            with slots["topics"].container():
+                analysis["topics"] = st.write_stream(analyze(llm, "topics", syllabus_text, stream=True))
 
     with tab2:
         st.subheader("🎯 Learning Resources")
-        if st.button("Suggest Resources"):
-            with st.spinner("Finding best resources..."):
-                resources = suggest_resources(syllabus_text)
-            st.markdown(resources)
+        clicked = st.button("Suggest Resources")
+        slots["resources"] = st.empty()
+        if clicked:
+            with slots["resources"].container():
+                analysis["resources"] = st.write_stream(analyze(llm, "resources", syllabus_text, stream=True))
 
     with tab3:
         st.subheader("💡 Study Tips & Career Relevance")
-        if st.button("Get Tips"):
-            with st.spinner("Generating tips..."):
-                tips = give_tips(syllabus_text)
-            st.markdown(tips)
+        clicked = st.button("Get Tips")
+        slots["tips"] = st.empty()
+        if clicked:
+            with slots["tips"].container():
+                analysis["tips"] = st.write_stream(analyze(llm, "tips", syllabus_text, stream=True))
 
     with tab4:
         st.subheader("📅 Personalized Study Plan")
-        if st.button("Generate Plan"):
-            with st.spinner("Creating study plan..."):
-                plan = generate_study_plan(syllabus_text)
-            with st.container(border=True):
-                st.markdown(plan)
+        clicked = st.button("Generate Plan")
+        slots["plan"] = st.empty()
+        if clicked:
+            with slots["plan"].container(border=True):
+                analysis["plan"] = st.write_stream(analyze(llm, "plan", syllabus_text, stream=True))
+
+    def show(name, result):
+        if name == "plan":
+            slots[name].container(border=True).markdown(result)
+        else:
+            slots[name].markdown(result)
+
+    if full_analysis:
+        for name in ANALYSES:
+            slots[name].info("⏳ Analyzing...")
+        for name, result in run_full_analysis(syllabus_text):
+            analysis[name] = result
+            show(name, result)
+    else:
+        for name, result in analysis.items():
+            show(name, result)
@@ -1,35 +1,29 @@
+import time
+
 import streamlit as st
-import pdfplumber
-import sqlite3
-from groq import Groq
+from smriti.budget import PAGE_BREAK, join_pages
+from smriti.gateway import fit_document, get_gateway, provider_ready
+from smriti.pipeline import Pipeline, Stage
+from smriti.storage import DEFAULT_USER, add_column, connection, ensure_schema, transaction
+from smriti.ui import current_user, read_pdf_pages
 
 # ---------------------------
-# GROQ SETUP
+# LLM GATEWAY
 # ---------------------------
-groq_api_key = st.secrets.get("GROQ_API_KEY")
-if not groq_api_key:
+if not provider_ready():
     st.error("GROQ_API_KEY not found in secrets.toml")
     st.stop()
 
-client = Groq(api_key=groq_api_key)
+llm = get_gateway()
 
-def groq_call(prompt, system="You are a helpful student productivity assistant."):
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
+def groq_call(prompt, site, system="You are a helpful student productivity assistant.", stream=False):
+    return llm.complete(prompt, system, site=site, stream=stream)
 
 # ---------------------------
 # DATABASE (FEEDBACK MEMORY)
 # ---------------------------
-def init_feedback_db():
-    conn = sqlite3.connect("memory.db")
-    c = conn.cursor()
-    c.execute("""
+def create_feedback_table(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS plan_feedback (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             plan_type TEXT,
@@ -38,50 +32,41 @@ def init_feedback_db():
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    conn.commit()
-    conn.close()
 
-init_feedback_db()
-
-def save_feedback(plan_type, feedback, action):
-    conn = sqlite3.connect("memory.db")
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO plan_feedback (plan_type, user_feedback, user_action) VALUES (?, ?, ?)",
-        (plan_type, feedback, action)
+def add_feedback_owner(conn):
+    add_column(conn, "plan_feedback", "user_id", f"TEXT NOT NULL DEFAULT '{DEFAULT_USER}'")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plan_feedback_user_type ON plan_feedback (user_id, plan_type, id)"
     )
-    conn.commit()
-    conn.close()
 
-def fetch_feedback():
-    conn = sqlite3.connect("memory.db")
-    data = conn.execute(
-        "SELECT user_action, user_feedback FROM plan_feedback ORDER BY id DESC LIMIT 5"
-    ).fetchall()
-    conn.close()
-    return data
+ensure_schema("plan_feedback", [create_feedback_table, add_feedback_owner])
+
+def save_feedback(user_id, plan_type, feedback, action):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO plan_feedback (user_id, plan_type, user_feedback, user_action) VALUES (?, ?, ?, ?)",
+            (user_id, plan_type, feedback, action)
+        )
+
+def fetch_feedback(user_id, plan_type="timetable_plan"):
+    with connection() as conn:
+        return conn.execute(
+            "SELECT user_action, user_feedback FROM plan_feedback "
+            "WHERE user_id = ? AND plan_type = ? ORDER BY id DESC LIMIT 5",
+            (user_id, plan_type)
+        ).fetchall()
 
 # ---------------------------
 # PDF TEXT EXTRACTION
 # ---------------------------
 def load_pdf(uploaded_file):
-    text = ""
-    with pdfplumber.open(uploaded_file) as pdf:
-        for page in pdf.pages:
-            extracted = page.extract_text()
-            if extracted:
-                text += extracted + "\n"
-            else:
-                table = page.extract_table()
-                if table:
-                    for row in table:
-                        text += " | ".join([cell if cell else "" for cell in row]) + "\n"
-    return text.strip()
+    return join_pages(read_pdf_pages(uploaded_file, tables=True)).strip()
 
 # ---------------------------
 # AI FUNCTIONS (NO LANGCHAIN)
 # ---------------------------
-def parse_timetable(text):
+def parse_timetable(text, stream=False):
+    text = fit_document(text, "timetable.parse_timetable")
     prompt = f"""
 Extract a student timetable from the text below.
 
@@ -97,9 +82,9 @@ Return a clean, readable MARKDOWN TABLE.
 TEXT:
 {text}
 """
-    return groq_call(prompt, system="You extract structured timetables from messy text.")
+    return groq_call(prompt, "timetable.parse_timetable", system="You extract structured timetables from messy text.", stream=stream)
 
-def generate_plan(timetable, feedback_memory):
+def generate_plan(timetable, feedback_memory, stream=False):
     prompt = f"""
 You are a student productivity coach.
 
@@ -116,7 +101,7 @@ Rules:
 
 Generate an improved WEEKLY STUDY PLAN as a markdown table.
 """
-    return groq_call(prompt, system="You design realistic study plans.")
+    return groq_call(prompt, "timetable.generate_plan", system="You design realistic study plans.", stream=stream)
 
 def explain_plan(timetable, weekly_plan, feedback_memory):
     prompt = f"""
@@ -137,9 +122,9 @@ Explain in bullet points:
 - How feedback influenced the plan
 - Overall strategy
 """
-    return groq_call(prompt, system="You explain plans clearly to students.")
+    return groq_call(prompt, "timetable.explain_plan", system="You explain plans clearly to students.")
 
-def chat(timetable, question):
+def chat(timetable, question, stream=False):
     prompt = f"""
 Student Timetable:
 {timetable}
@@ -149,7 +134,7 @@ Question:
 
 Give a friendly, practical answer.
 """
-    return groq_call(prompt, system="You are a friendly student assistant.")
+    return groq_call(prompt, "timetable.chat", system="You are a friendly student assistant.", stream=stream)
 
 def map_topics_to_free_slots(timetable, weekly_plan):
     prompt = f"""
@@ -176,7 +161,26 @@ Timetable:
 Weekly Plan:
 {weekly_plan}
 """
-    return groq_call(prompt, system="You map study topics to free time.")
+    return groq_call(prompt, "timetable.map_topics_to_free_slots", system="You map study topics to free time.")
+
+def feedback_memory(user_id):
+    past_feedback = fetch_feedback(user_id)
+    return "\n".join([f"- {a.upper()}: {t}" for a, t in past_feedback])
+
+def stream_stage(slot, fn, *args):
+    """Stream ``fn(*args)`` into ``slot``; returns the text and how long it took."""
+    start = time.perf_counter()
+    with slot.container():
+        text = st.write_stream(fn(*args, stream=True))
+    return text, time.perf_counter() - start
+
+# The timetable and weekly plan are on the critical path, so they stream into
+# the page token by token. Explanation and slot mapping only need those two,
+# so the executor then runs them side by side.
+TIMETABLE_PIPELINE = [
+    Stage("explanation", explain_plan, ("timetable", "weekly_plan", "feedback_text")),
+    Stage("slot_plan", map_topics_to_free_slots, ("timetable", "weekly_plan")),
+]
 
 # ---------------------------
 # UI
@@ -184,6 +188,8 @@ Weekly Plan:
 st.title("📅 Smart Timetable Feedback Agent")
 st.caption("Human-in-the-loop AI timetable planner")
 
+user_id = current_user()
+
 tab1, tab2 = st.tabs(["Upload PDF", "Write Timetable"])
 
 if "raw_text" not in st.session_state:
@@ -198,7 +204,7 @@ with tab1:
             st.stop()
 
         st.subheader("📄 Extracted Text Preview")
-        st.text_area("Preview", st.session_state["raw_text"][:2000], height=200)
+        st.text_area("Preview", st.session_state["raw_text"][:2000].replace(PAGE_BREAK, "\n"), height=200)
 
 with tab2:
     typed_text = st.text_area("Write timetable in any format")
@@ -229,34 +235,45 @@ if st.button("Generate Smart Timetable"):
         st.error("❌ Please upload or enter timetable")
         st.stop()
 
-    with st.spinner("Understanding your timetable..."):
-        timetable = parse_timetable(raw_text)
     st.subheader("📘 Extracted Timetable")
-    st.markdown(timetable)
+    slots = {"timetable": st.empty()}
 
-    past_feedback = fetch_feedback()
-    feedback_text = "\n".join([f"- {a.upper()}: {t}" for a, t in past_feedback])
-
-    with st.spinner("Optimizing your week..."):
-        weekly_plan = generate_plan(timetable, feedback_text)
     st.subheader("🗓️ Weekly Study Plan")
-    st.markdown(weekly_plan)
+    slots["weekly_plan"] = st.empty()
 
-    with st.spinner("Explaining the plan..."):
-        explanation = explain_plan(timetable, weekly_plan, feedback_text)
     st.subheader("🧐 Why This Plan?")
     with st.expander("See explanation"):
-        st.markdown(explanation)
+        slots["explanation"] = st.empty()
 
-    with st.spinner("Mapping topics to free slots..."):
-        slot_plan = map_topics_to_free_slots(timetable, weekly_plan)
     st.subheader("🧠 Slot-wise Action Plan")
-    st.markdown(slot_plan)
+    slots["slot_plan"] = st.empty()
+
+    for slot in slots.values():
+        slot.caption("⏳ Working on it...")
+
+    results = {"feedback_text": feedback_memory(user_id)}
+    timings = {}
+    results["timetable"], timings["timetable"] = stream_stage(slots["timetable"], parse_timetable, raw_text)
+    results["weekly_plan"], timings["weekly_plan"] = stream_stage(
+        slots["weekly_plan"], generate_plan, results["timetable"], results["feedback_text"]
+    )
+
+    pipeline = Pipeline(TIMETABLE_PIPELINE)
+    for result in pipeline.run(**results):
+        results[result.name] = result.value
+        slots[result.name].markdown(result.value)
+    timings.update(pipeline.timings)
+
+    with st.expander("⏱️ Stage timings"):
+        st.table({
+            "Stage": list(timings),
+            "Seconds": [round(s, 2) for s in timings.values()]
+        })
 
     st.session_state.update({
-        "weekly_plan": weekly_plan,
-        "timetable": timetable,
-        "slot_plan": slot_plan
+        "weekly_plan": results["weekly_plan"],
+        "timetable": results["timetable"],
+        "slot_plan": results["slot_plan"]
     })
 
 # ---------------------------
@@ -271,17 +288,17 @@ c1, c2, c3 = st.columns(3)
 
 with c1:
     if st.button("✅ Approve"):
-        save_feedback("timetable_plan", "Approved", "approved")
+        save_feedback(user_id, "timetable_plan", "Approved", "approved")
         st.success("Future plans will follow this style.")
 
 with c2:
     if st.button("✏️ Modify") and user_change.strip():
-        save_feedback("timetable_plan", user_change, "modified")
+        save_feedback(user_id, "timetable_plan", user_change, "modified")
         st.info("Got it. I’ll improve future plans.")
 
 with c3:
     if st.button("❌ Reject") and reason.strip():
-        save_feedback("timetable_plan", reason, "rejected")
+        save_feedback(user_id, "timetable_plan", reason, "rejected")
         st.warning("Understood. I’ll avoid this approach.")
 
 # ---------------------------
@@ -291,4 +308,5 @@ st.subheader("💬 Chat with your Timetable AI")
 user_q = st.text_input("Ask anything about your schedule")
 
 if user_q and "timetable" in st.session_state:
-    st.info(chat(st.session_state["timetable"], user_q))
+    with st.container(border=True):
+        st.write_stream(chat(st.session_state["timetable"], user_q, stream=True))
@@ -1,92 +1,163 @@
 import streamlit as st
-import pdfplumber
 import uuid
 import os
-from groq import Groq
-from collections import Counter
+from smriti.answer_cache import AnswerCache
+from smriti.chat_store import append_message, count_threads, create_thread, init_chat_db, list_threads, recent_messages
+from smriti.doc_cache import document_hash
+from smriti.ingest import IngestJob
+from smriti.gateway import fit_document, get_gateway, provider_ready
+from smriti.summarize import MapReduceSummarizer, content_key, split_sections
+from smriti.ui import current_user
+from smriti.vector_index import DenseIndex, encode, load_encoder, reciprocal_rank_fusion
 
 # ---------------------------
-# GROQ SETUP
+# LLM GATEWAY
 # ---------------------------
-groq_api_key = st.secrets.get("GROQ_API_KEY")
-if not groq_api_key:
+if not provider_ready():
     st.error("GROQ_API_KEY missing in secrets.toml")
     st.stop()
 
-client = Groq(api_key=groq_api_key)
+llm = get_gateway()
 
-def groq_call(prompt, system="You are a helpful academic tutor."):
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
+def groq_call(prompt, site, system="You are a helpful academic tutor.", stream=False):
+    return llm.complete(prompt, system, site=site, stream=stream)
+
+# ---------------------------
+# CHAT STORAGE (SQLITE)
+# ---------------------------
+MESSAGE_WINDOW = 20
+MAX_LOADED_MESSAGES = 100
+THREADS_PER_PAGE = 10
+
+init_chat_db()
+user_id = current_user()
 
 # ---------------------------
 # SESSION STATE
 # ---------------------------
+# Only the active thread's recent window lives in memory; everything else is in SQLite.
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = str(uuid.uuid4())
 
-if "chat_threads" not in st.session_state:
-    st.session_state.chat_threads = []
+if "thread_name" not in st.session_state:
+    st.session_state.thread_name = None
 
-if "chat_store" not in st.session_state:
-    st.session_state.chat_store = {}
+# Not "messages": the Motivation page keeps its own chat under that key.
+if "tutor_messages" not in st.session_state:
+    st.session_state.tutor_messages = []
 
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "has_older" not in st.session_state:
+    st.session_state.has_older = False
 
-if "thread_names" not in st.session_state:
-    st.session_state.thread_names = {}
-
-if st.session_state.thread_id not in st.session_state.chat_threads:
-    st.session_state.chat_threads.append(st.session_state.thread_id)
+if "thread_page" not in st.session_state:
+    st.session_state.thread_page = 0
 
 # ---------------------------
 # HELPERS
 # ---------------------------
 def reset_chat():
-    tid = str(uuid.uuid4())
-    st.session_state.thread_id = tid
-    st.session_state.chat_threads.append(tid)
-    st.session_state.messages = []
-    st.session_state.thread_names[tid] = f"💬 Chat {len(st.session_state.chat_threads)}"
+    st.session_state.thread_id = str(uuid.uuid4())
+    st.session_state.thread_name = f"💬 Chat {count_threads(user_id) + 1}"
+    st.session_state.tutor_messages = []
+    st.session_state.has_older = False
 
 def load_conversation(tid):
-    return st.session_state.chat_store.get(tid, [])
+    st.session_state.thread_id = tid
+    st.session_state.thread_name = None
+    st.session_state.tutor_messages = recent_messages(tid, MESSAGE_WINDOW, user_id=user_id)
+    st.session_state.has_older = len(st.session_state.tutor_messages) == MESSAGE_WINDOW
+
+def load_older_messages():
+    messages = st.session_state.tutor_messages
+    before = messages[0]["seq"] if messages else None
+    older = recent_messages(st.session_state.thread_id, MESSAGE_WINDOW, before_seq=before, user_id=user_id)
+    st.session_state.tutor_messages = older + messages
+    st.session_state.has_older = len(older) == MESSAGE_WINDOW
+
+def save_message(role, content):
+    create_thread(st.session_state.thread_id, st.session_state.thread_name or "💬 Chat", user_id)
+    seq = append_message(st.session_state.thread_id, role, content, user_id)
+    st.session_state.tutor_messages.append({"seq": seq, "role": role, "content": content})
+    if len(st.session_state.tutor_messages) > MAX_LOADED_MESSAGES:
+        del st.session_state.tutor_messages[:-MESSAGE_WINDOW]
+        st.session_state.has_older = True
+
+# A different signed-in user starts from their own conversations.
+if st.session_state.get("chat_user", user_id) != user_id:
+    reset_chat()
+    st.session_state.thread_page = 0
+st.session_state.chat_user = user_id
 
 # ---------------------------
-# PDF LOADING
+# PDF LOADING (STREAMED IN THE BACKGROUND)
 # ---------------------------
-def load_pdf(uploaded_file):
-    text = ""
-    with pdfplumber.open(uploaded_file) as pdf:
-        for page in pdf.pages:
-            extracted = page.extract_text()
-            if extracted:
-                text += extracted + "\n"
-    return text.strip()
+@st.cache_resource(max_entries=8, show_spinner=False)
+def start_ingestion(doc_hash, _data):
+    return IngestJob(_data)
+
+@st.fragment(run_every=1)
+def ingestion_progress(job):
+    if job.done:
+        st.rerun()
+    total = job.total_pages
+    st.progress(
+        job.pages_done / total if total else 0.0,
+        text=f"Indexed {job.pages_done} of {total or '?'} pages — you can already ask about the pages read so far"
+    )
 
 # ---------------------------
-# SIMPLE RAG (NO EMBEDDINGS)
+# RAG (BM25 + OPTIONAL EMBEDDINGS)
 # ---------------------------
-def chunk_text(text, size=500):
-    words = text.split()
-    return [" ".join(words[i:i+size]) for i in range(0, len(words), size)]
+RETRIEVAL_MODES = {
+    "Keyword (BM25)": "keyword",
+    "Semantic (Embeddings)": "semantic",
+    "Hybrid": "hybrid",
+}
+MIN_SIMILARITY = 0.2
+
+@st.cache_resource(show_spinner="Loading embedding model...")
+def get_encoder():
+    return load_encoder()
 
-def keyword_score(chunk, question):
-    q_words = Counter(question.lower().split())
-    c_words = Counter(chunk.lower().split())
-    return sum((q_words & c_words).values())
+# Keyed by the document hash alone: hashing every chunk's text on each question
+# would cost more than the search itself on large notes.
+@st.cache_resource(max_entries=4, show_spinner="Embedding your notes...")
+def build_dense_index(doc_hash, _texts):
+    return DenseIndex(get_encoder(), _texts)
 
-def retrieve_chunks(chunks, question, k=3):
-    scored = [(chunk, keyword_score(chunk, question)) for chunk in chunks]
-    scored = sorted(scored, key=lambda x: x[1], reverse=True)
-    return [c for c, s in scored[:k] if s > 0]
+def retrieve_chunks(job, doc_hash, question, k=3, mode="keyword"):
+    lexical = [(i, s) for i, s in job.search(question, k * 2) if s > 0]
+    chunks = job.chunks
+    # Embeddings are built once the whole document is in; until then stay lexical.
+    if mode == "keyword" or not job.done:
+        return [chunks[i] for i, _ in lexical[:k]]
+
+    index = build_dense_index(doc_hash, (chunk.text for chunk in chunks))
+    dense = [(i, s) for i, s in index.search(question, k * 2) if s >= MIN_SIMILARITY]
+    if mode == "semantic":
+        return [chunks[i] for i, _ in dense[:k]]
+
+    return [chunks[i] for i, _ in reciprocal_rank_fusion([lexical, dense], k)]
+
+# ---------------------------
+# ANSWER CACHE
+# ---------------------------
+ANSWER_CACHE_TTL = 24 * 3600
+ANSWER_CACHE_SIMILARITY = 0.92
+SEMANTIC_ANSWER_CACHE = True
+
+def embed_question(text):
+    # Resolved on first use, so Keyword mode never loads the encoder.
+    return encode(get_encoder(), [text])[0]
+
+@st.cache_resource
+def get_answer_cache():
+    embed = embed_question if SEMANTIC_ANSWER_CACHE else None
+    return AnswerCache(ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_SIMILARITY, embed=embed)
+
+def page_label(chunks):
+    pages = sorted({p + 1 for c in chunks for p in range(c.page_start, c.page_end + 1)})
+    return ", ".join(str(p) for p in pages)
 
 def confidence_score(chunks):
     if not chunks:
@@ -96,7 +167,7 @@ def confidence_score(chunks):
 # ---------------------------
 # AI FUNCTIONS
 # ---------------------------
-def answer_question(context, question):
+def answer_question(context, question, stream=False):
     prompt = f"""
 Use the following context to answer the question.
 
@@ -106,15 +177,63 @@ Context:
 Question:
 {question}
 """
-    return groq_call(prompt)
+    return groq_call(prompt, "tutor.answer_question", stream=stream)
 
-def generate_summary(text):
+# ---------------------------
+# MAP-REDUCE SUMMARY
+# ---------------------------
+def summarize_section(text):
+    text = fit_document(text, "tutor.summarize_section")
     prompt = f"""
-Create a clear academic summary from the following notes.
+Create a clear academic summary of this section of the notes.
+Keep key definitions, formulas and examples.
 
 {text}
 """
-    return groq_call(prompt, system="You summarize academic notes.")
+    return groq_call(prompt, "tutor.summarize_section", system="You summarize academic notes.")
+
+def merge_summaries(parts, stream=False):
+    joined = "\n\n---\n\n".join(parts)
+    prompt = f"""
+Combine the following partial summaries into one clear academic summary.
+Remove repetition and keep the original order of topics.
+
+{joined}
+"""
+    return groq_call(prompt, "tutor.merge_summaries", system="You summarize academic notes.", stream=stream)
+
+@st.cache_resource
+def get_summarizer():
+    return MapReduceSummarizer(summarize_section, merge_summaries, max_workers=4)
+
+def generate_summary(pages):
+    summarizer = get_summarizer()
+    sections = split_sections(pages)
+    total = max(1, summarizer.task_count(sections))
+    progress = st.progress(0.0, text="Summarizing sections...")
+    done = 0
+
+    def tick():
+        nonlocal done
+        done += 1
+        progress.progress(min(done / total, 1.0), text=f"Summarized {done} of {total} parts")
+
+    parts = summarizer.partial_summaries(sections, on_progress=tick)
+    progress.empty()
+
+    if len(parts) <= 1:
+        summary = parts[0] if parts else ""
+        st.markdown(summary)
+        return summary
+
+    key = content_key("reduce", parts)
+    summary = summarizer.cached(key)
+    if summary is None:
+        summary = st.write_stream(merge_summaries(parts, stream=True))
+        summarizer.store(key, summary)
+    else:
+        st.markdown(summary)
+    return summary
 
 # ---------------------------
 # UI STYLES
@@ -143,15 +262,25 @@ if st.sidebar.button("➕ New Chat"):
     reset_chat()
     st.rerun()
 
+retrieval_label = st.sidebar.selectbox("🔎 Retrieval Mode", list(RETRIEVAL_MODES))
+retrieval_mode = RETRIEVAL_MODES[retrieval_label]
+
 st.sidebar.subheader("My Conversations")
 
-for tid in st.session_state.chat_threads[::-1]:
-    name = st.session_state.thread_names.get(tid, tid[:8])
-    if st.sidebar.button(name):
-        st.session_state.thread_id = tid
-        st.session_state.messages = load_conversation(tid)
+thread_page = st.session_state.thread_page
+for tid, name in list_threads(user_id, limit=THREADS_PER_PAGE, offset=thread_page * THREADS_PER_PAGE):
+    if st.sidebar.button(name or tid[:8], key=f"thread_{tid}"):
+        load_conversation(tid)
         st.rerun()
 
+newer_col, older_col = st.sidebar.columns(2)
+if thread_page > 0 and newer_col.button("◀ Newer"):
+    st.session_state.thread_page -= 1
+    st.rerun()
+if (thread_page + 1) * THREADS_PER_PAGE < count_threads(user_id) and older_col.button("Older ▶"):
+    st.session_state.thread_page += 1
+    st.rerun()
+
 # ---------------------------
 # MAIN UI
 # ---------------------------
@@ -160,43 +289,72 @@ st.write("Ask questions from your notes or generate a summary.")
 
 uploaded_pdf = st.file_uploader("Upload Notes PDF", type="pdf")
 
-for msg in st.session_state.messages:
+if st.session_state.has_older and st.button("⬆ Load older messages"):
+    load_older_messages()
+    st.rerun()
+
+for msg in st.session_state.tutor_messages:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
 if uploaded_pdf:
-    text = load_pdf(uploaded_pdf)
-    chunks = chunk_text(text)
-    st.success("PDF processed successfully!")
-
-    if st.session_state.thread_id not in st.session_state.thread_names:
+    data = uploaded_pdf.getvalue()
+    doc_hash = document_hash(data)
+    job = start_ingestion(doc_hash, data)
+    if not job.done:
+        ingestion_progress(job)
+    elif job.error:
+        # Forget the failed job so the next upload or rerun tries again.
+        start_ingestion.clear(doc_hash, None)
+        st.error(f"❌ Could not read this PDF: {job.error}")
+        st.stop()
+    else:
+        st.success("PDF processed successfully!")
+
+    if not st.session_state.thread_name and not st.session_state.tutor_messages:
         base = os.path.splitext(uploaded_pdf.name)[0]
-        st.session_state.thread_names[st.session_state.thread_id] = f"📘 {base}"
+        st.session_state.thread_name = f"📘 {base}"
 
     option = st.radio("Choose Action", ["ASK DOUBTS", "GENERATE SUMMARY"])
 
     if option == "ASK DOUBTS":
         question = st.chat_input("Ask your doubt")
         if question:
-            st.session_state.messages.append({"role": "user", "content": question})
+            save_message("user", question)
             with st.chat_message("user"):
                 st.markdown(question)
 
-            relevant = retrieve_chunks(chunks, question)
-            context = "\n\n".join(relevant)
-            confidence = confidence_score(relevant)
+            answer_cache = get_answer_cache()
+            # Similar-question matching needs the encoder, which only embedding modes load.
+            cached = answer_cache.get(doc_hash, question, semantic=retrieval_mode != "keyword")
 
             with st.chat_message("assistant"):
-                answer = answer_question(context, question)
-                st.markdown(answer)
+                if cached:
+                    answer, confidence, sources = cached.answer, cached.confidence, cached.sources
+                    st.markdown(answer)
+                else:
+                    relevant = retrieve_chunks(job, doc_hash, question, mode=retrieval_mode)
+                    context = "\n\n".join(chunk.text for chunk in relevant)
+                    confidence = confidence_score(relevant)
+                    sources = page_label(relevant)
+                    answer = st.write_stream(answer_question(context, question, stream=True))
+                    # Answers from a partially indexed document are not final enough to share.
+                    if job.done:
+                        answer_cache.put(doc_hash, question, answer, confidence, sources)
+
                 st.markdown(f"### ✅ Confidence Score: **{confidence}%**")
+                if sources:
+                    st.caption(f"📄 Sources: page {sources}")
+                if cached:
+                    note = "⚡ Answered instantly from cache"
+                    if cached.similarity < 1.0:
+                        note += f" (matched a similar question, {cached.similarity:.0%} similar)"
+                    st.caption(note)
                 if confidence < 60:
                     st.warning("⚠ Answer may be less reliable due to weak context match.")
 
-            st.session_state.messages.append({"role": "assistant", "content": answer})
-            st.session_state.chat_store[st.session_state.thread_id] = st.session_state.messages
+            save_message("assistant", answer)
 
     elif option == "GENERATE SUMMARY":
-        if st.button("GENERATE SUMMARY"):
-            summary = generate_summary(text)
-            st.markdown(summary)
+        if st.button("GENERATE SUMMARY", disabled=not job.done):
+            summary = generate_summary(list(job.pages))
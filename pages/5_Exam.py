@@ -1,30 +1,22 @@
 import streamlit as st
 import networkx as nx
 import matplotlib.pyplot as plt
-from pypdf import PdfReader
-from groq import Groq
+from smriti.budget import join_pages
+from smriti.gateway import fit_document, get_gateway, provider_ready
+from smriti.ui import read_pdf_pages
 import os
 
 # --------------------------------------------------
-# GROQ SETUP
+# LLM GATEWAY
 # --------------------------------------------------
-groq_api_key = st.secrets.get("GROQ_API_KEY")
-if not groq_api_key:
+if not provider_ready():
     st.error("GROQ_API_KEY not found in secrets.toml")
     st.stop()
 
-client = Groq(api_key=groq_api_key)
+llm = get_gateway()
 
-def groq_call(prompt, system="You are an expert exam mentor."):
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.4
-    )
-    return response.choices[0].message.content
+def groq_call(prompt, site, system="You are an expert exam mentor.", stream=False):
+    return llm.complete(prompt, system, site=site, stream=stream, temperature=0.4)
 
 # --------------------------------------------------
 # STREAMLIT PAGE SETUP
@@ -42,17 +34,13 @@ st.caption("Quick Revision • Mind Maps • Practice Questions • Exam Strateg
 # PDF TEXT EXTRACTION
 # --------------------------------------------------
 def extract_text_from_pdf(uploaded_file):
-    reader = PdfReader(uploaded_file)
-    text = ""
-    for page in reader.pages:
-        if page.extract_text():
-            text += page.extract_text() + "\n"
-    return text
+    return join_pages(read_pdf_pages(uploaded_file))
 
 # --------------------------------------------------
 # AI FEATURES
 # --------------------------------------------------
-def quick_revision(syllabus):
+def quick_revision(syllabus, stream=False):
+    syllabus = fit_document(syllabus, "exam.quick_revision")
     return groq_call(f"""
 Generate a 10-minute quick revision.
 
@@ -64,9 +52,10 @@ Focus on:
 
 Syllabus:
 {syllabus}
-""")
+""", "exam.quick_revision", stream=stream)
 
 def mind_map_structure(syllabus):
+    syllabus = fit_document(syllabus, "exam.mind_map_structure")
     return groq_call(f"""
 Convert the syllabus into a mind map structure.
 
@@ -82,9 +71,10 @@ Subtopic -> Point
 
 Syllabus:
 {syllabus}
-""", system="You generate structured academic mind maps.")
+""", "exam.mind_map_structure", system="You generate structured academic mind maps.")
 
-def practice_questions(syllabus):
+def practice_questions(syllabus, stream=False):
+    syllabus = fit_document(syllabus, "exam.practice_questions")
     return groq_call(f"""
 Generate exam-oriented practice questions.
 
@@ -95,9 +85,10 @@ For each question mention:
 
 Syllabus:
 {syllabus}
-""")
+""", "exam.practice_questions", stream=stream)
 
-def exam_strategy(syllabus, instructions):
+def exam_strategy(syllabus, instructions, stream=False):
+    syllabus = fit_document(syllabus, "exam.exam_strategy")
     return groq_call(f"""
 Based on the syllabus and exam instructions:
 
@@ -112,9 +103,9 @@ Syllabus:
 
 Exam Instructions:
 {instructions}
-""", system="You are an exam strategy expert.")
+""", "exam.exam_strategy", system="You are an exam strategy expert.", stream=stream)
 
-def evaluate_answers(questions, user_answers):
+def evaluate_answers(questions, user_answers, stream=False):
     return groq_call(f"""
 Evaluate the student's answers.
 
@@ -138,7 +129,7 @@ Feedback:
 
 Motivation:
 "..."
-""", system="You are a fair and encouraging exam evaluator.")
+""", "exam.evaluate_answers", system="You are a fair and encouraging exam evaluator.", stream=stream)
 
 # --------------------------------------------------
 # MIND MAP IMAGE
@@ -187,9 +178,8 @@ uploaded_pdf = st.file_uploader("📄 Upload syllabus PDF", type=["pdf"])
 
 syllabus = ""
 if uploaded_pdf:
-    with st.spinner("Extracting text from PDF..."):
-        syllabus += extract_text_from_pdf(uploaded_pdf)
-        st.success("PDF syllabus loaded ✔")
+    syllabus += extract_text_from_pdf(uploaded_pdf)
+    st.success("PDF syllabus loaded ✔")
 
 if text_syllabus.strip():
     syllabus += "\n" + text_syllabus
@@ -208,9 +198,8 @@ col1, col2 = st.columns(2)
 
 with col1:
     if st.button("⚡ 10-Minute Quick Revision") and syllabus.strip():
-        with st.spinner("Preparing quick revision..."):
-            st.subheader("📌 Quick Revision")
-            st.write(quick_revision(syllabus))
+        st.subheader("📌 Quick Revision")
+        st.write_stream(quick_revision(syllabus, stream=True))
 
     if st.button("🗺️ Generate Mind Map"):
         with st.spinner("Creating mind map..."):
@@ -221,10 +210,8 @@ with col1:
 
 with col2:
     if st.button("🔥 Practice Questions") and syllabus.strip():
-        with st.spinner("Generating questions..."):
-            st.session_state["questions"] = practice_questions(syllabus)
         st.subheader("📝 Practice Questions")
-        st.write(st.session_state["questions"])
+        st.session_state["questions"] = st.write_stream(practice_questions(syllabus, stream=True))
 
 # --------------------------------------------------
 # ANSWER EVALUATION
@@ -234,13 +221,12 @@ if "questions" in st.session_state:
     user_answers = st.text_area("Write answers", height=200)
 
     if st.button("✅ Submit Answers"):
-        with st.spinner("Evaluating..."):
-            result = evaluate_answers(
-                st.session_state["questions"],
-                user_answers
-            )
         st.subheader("📊 Evaluation Result")
-        st.write(result)
+        result = st.write_stream(evaluate_answers(
+            st.session_state["questions"],
+            user_answers,
+            stream=True
+        ))
 
 st.divider()
 
@@ -257,9 +243,8 @@ instructions = st.text_area(
 
 if st.button("🧠 Generate Exam Strategy"):
     if syllabus.strip() and instructions.strip():
-        with st.spinner("Generating strategy..."):
-            st.subheader("🎯 Exam Strategy")
-            st.write(exam_strategy(syllabus, instructions))
+        st.subheader("🎯 Exam Strategy")
+        st.write_stream(exam_strategy(syllabus, instructions, stream=True))
     else:
         st.warning("Please enter syllabus and instructions.")
 
@@ -1,7 +1,7 @@
 import streamlit as st
 import random
-import os
 import re
+from smriti.gateway import get_gateway, provider_ready
 
 # ======================
 # PAGE CONFIG
@@ -57,10 +57,7 @@ OFFLINE_RESPONSES = {
 # ======================
 # GROQ LLM (ONLINE MODE)
 # ======================
-def groq_response(messages, lang):
-    from groq import Groq
-    client = Groq(api_key=os.environ["GROQ_API_KEY"])
-
+def groq_response(messages, lang, stream=False):
     if lang == "hinglish":
         system_prompt = (
             "You are a friendly, supportive motivation buddy for students. "
@@ -77,17 +74,16 @@ def groq_response(messages, lang):
         )
 
     chat = [{"role": "system", "content": system_prompt}]
-    chat.extend(messages)
+    chat.extend({"role": m["role"], "content": m["content"]} for m in messages)
 
-    completion = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=chat,
+    return get_gateway().chat(
+        chat,
+        site="motivation.groq_response",
+        stream=stream,
         temperature=0.75,
         max_tokens=250
     )
 
-    return completion.choices[0].message.content
-
 # ======================
 # CHAT DISPLAY
 # ======================
@@ -111,20 +107,18 @@ if user_input:
     with st.chat_message("user"):
         st.write(user_input)
 
-    # Generate response
-    if mode.startswith("Online") and "GROQ_API_KEY" in os.environ:
-        reply = groq_response(st.session_state.messages, lang)
-    else:
-        reply = random.choice(OFFLINE_RESPONSES[lang])
+    # Generate and show assistant message
+    with st.chat_message("assistant"):
+        if mode.startswith("Online") and provider_ready():
+            reply = st.write_stream(groq_response(st.session_state.messages, lang, stream=True))
+        else:
+            reply = random.choice(OFFLINE_RESPONSES[lang])
+            st.write(reply)
 
-    # Show assistant message
     st.session_state.messages.append(
         {"role": "assistant", "content": reply}
     )
 
-    with st.chat_message("assistant"):
-        st.write(reply)
-
 st.markdown("""
 <style>
 .stApp {
@@ -1,7 +1,7 @@
 import streamlit as st
 import os
 import random
-from groq import Groq
+from smriti.gateway import get_gateway, provider_ready
 
 # ----------------------------
 # Streamlit Setup
@@ -65,22 +65,14 @@ if mode == "Offline Mode":
 else:
     st.subheader("🌐 Online Game-Based Learning")
 
-    groq_api_key = st.secrets.get("GROQ_API_KEY")
-    if not groq_api_key:
+    if not provider_ready():
         st.error("GROQ_API_KEY not found in secrets.toml")
         st.stop()
 
-    client = Groq(api_key=groq_api_key)
+    llm = get_gateway()
 
-    def groq_call(prompt, system="You are an interactive learning game master."):
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content
+    def groq_call(prompt, site, system="You are an interactive learning game master.", stream=False):
+        return llm.complete(prompt, system, site=site, stream=stream)
 
     game_type = st.selectbox(
         "Choose Learning Game",
@@ -102,7 +94,7 @@ Do NOT give the answer.
 Keep it short and engaging.
 """
 
-        st.session_state.question = groq_call(question_prompt)
+        st.session_state.question = groq_call(question_prompt, "skill.challenge")
 
     # ----------------------------
     # SHOW QUESTION
@@ -134,13 +126,14 @@ Now:
 4. Motivate the student
 """
 
-            feedback = groq_call(
-                feedback_prompt,
-                system="You are a strict but friendly skill coach."
-            )
-
             st.markdown("### 🤖 AI Feedback")
-            st.success(feedback)
+            with st.container(border=True):
+                feedback = st.write_stream(groq_call(
+                    feedback_prompt,
+                    "skill.feedback",
+                    system="You are a strict but friendly skill coach.",
+                    stream=True
+                ))
 
 
 st.markdown("""
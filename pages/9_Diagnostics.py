@@ -0,0 +1,111 @@
+import streamlit as st
+import pandas as pd
+import time
+from dataclasses import asdict
+from smriti.gateway import PROVIDER, get_gateway, provider_ready
+from smriti.metrics import get_metrics, group_by, summarize
+
+st.set_page_config(page_title="Smriti AI – Diagnostics", page_icon="🩺", layout="wide")
+
+# ---------------------------
+# HELPERS
+# ---------------------------
+HISTORY_WINDOWS = {
+    "Last hour": 3600,
+    "Last 24 hours": 24 * 3600,
+    "Last 7 days": 7 * 24 * 3600,
+    "All time": None,
+}
+RECENT_CALLS = 50
+
+def seconds(value):
+    return "–" if value is None else f"{value:.2f}s"
+
+def summary_table(groups, label):
+    return pd.DataFrame([
+        {
+            label: name,
+            "Calls": s["calls"],
+            "p50 (s)": s["p50"],
+            "p95 (s)": s["p95"],
+            "p99 (s)": s["p99"],
+            "Prompt tokens": s["prompt_tokens"],
+            "Completion tokens": s["completion_tokens"],
+            "Cache hit rate": f"{s['cache_hit_rate']:.0%}",
+            "Shared in flight": f"{s['shared_rate']:.0%}",
+            "Error rate": f"{s['error_rate']:.0%}",
+        }
+        for name, s in groups.items()
+    ])
+
+# ---------------------------
+# UI
+# ---------------------------
+st.title("🩺 LLM Diagnostics")
+st.caption(f"Provider: **{PROVIDER}** · latency, tokens, cache hits and errors for every LLM call")
+
+metrics = get_metrics()
+sources = ["This server process"]
+if metrics.db_path:
+    sources.append("Saved history")
+
+source = st.radio("Data source", sources, horizontal=True)
+if source == "Saved history":
+    window = HISTORY_WINDOWS[st.selectbox("Window", list(HISTORY_WINDOWS))]
+    records = metrics.history(since=time.time() - window if window else None)
+else:
+    records = metrics.recent()
+    if st.button("🧹 Clear buffer"):
+        metrics.clear()
+        st.rerun()
+
+if not records:
+    st.info("No LLM calls recorded yet. Use any page, then come back here.")
+    st.stop()
+
+overall = summarize(records)
+c1, c2, c3, c4, c5, c6, c7 = st.columns(7)
+c1.metric("Calls", overall["calls"])
+c2.metric("p50 latency", seconds(overall["p50"]))
+c3.metric("p95 latency", seconds(overall["p95"]))
+c4.metric("p99 latency", seconds(overall["p99"]))
+c5.metric("Cache hit rate", f"{overall['cache_hit_rate']:.0%}")
+c6.metric("Shared in flight", f"{overall['shared_rate']:.0%}")
+c7.metric("Error rate", f"{overall['error_rate']:.0%}")
+
+# ---------------------------
+# BREAKDOWNS
+# ---------------------------
+st.subheader("📄 By page")
+pages = summary_table(group_by(records, lambda r: r.page), "Page")
+st.bar_chart(pages.set_index("Page")[["Prompt tokens", "Completion tokens"]])
+st.dataframe(pages, hide_index=True, use_container_width=True)
+
+st.subheader("🔧 By function")
+st.dataframe(summary_table(group_by(records, lambda r: r.site), "Call site"), hide_index=True, use_container_width=True)
+
+streamed = [r.first_token for r in records if r.first_token is not None]
+if streamed:
+    st.caption(f"Median time to first token on streamed calls: {seconds(pd.Series(streamed).median())}")
+
+# ---------------------------
+# SCHEDULER
+# ---------------------------
+st.subheader("🚦 Request scheduler")
+if provider_ready():
+    sched = get_gateway().scheduler.metrics()
+    s1, s2, s3, s4 = st.columns(4)
+    s1.metric("Queue depth", sched["queue_depth"])
+    s2.metric("Avg queue wait", seconds(sched["avg_wait"]))
+    s3.metric("Max queue wait", seconds(sched["max_wait"]))
+    s4.metric("Retries / failures", f"{sched['retries']} / {sched['failures']}")
+else:
+    st.caption("No LLM provider configured.")
+
+# ---------------------------
+# RECENT CALLS
+# ---------------------------
+st.subheader("🕒 Recent calls")
+recent = pd.DataFrame([asdict(r) for r in records[-RECENT_CALLS:]][::-1])
+recent["created"] = pd.to_datetime(recent["created"], unit="s")
+st.dataframe(recent, hide_index=True, use_container_width=True)
@@ -0,0 +1 @@
+"""Shared engine code used by the Smriti AI Streamlit pages."""
@@ -0,0 +1,123 @@
+"""Answer cache for repeated Tutor questions.
+
+Answers are keyed by (document hash, normalized question). When an
+``embed`` function is supplied, a semantic lookup that misses the exact key
+falls back to the most similar cached question for the same document,
+accepted above a cosine-similarity threshold. Questions are only embedded
+when such a lookup happens, so exact-match use never loads the model; if
+``embed`` fails, the cache logs it and stays exact-match only. Entries
+expire after a TTL and the least recently used ones are evicted beyond
+``max_entries``.
+"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+NORMALIZE_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question):
+    return " ".join(NORMALIZE_RE.sub(" ", question.lower()).split())
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    confidence: int
+    sources: str = ""
+    similarity: float = 1.0
+    created: float = field(default_factory=time.time)
+    vector: object = None
+
+
+class AnswerCache:
+    def __init__(self, max_entries=2048, ttl=24 * 3600, threshold=0.92, embed=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.embed = embed
+        self._entries = OrderedDict()
+        self._by_doc = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        doc_keys = self._by_doc.get(key[0])
+        if doc_keys is not None:
+            doc_keys.discard(key)
+            if not doc_keys:
+                del self._by_doc[key[0]]
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.created > self.ttl:
+            self._drop(key)
+            return None
+        return entry
+
+    def _embed(self, text):
+        try:
+            return self.embed(text)
+        except Exception:
+            logger.warning("Embedding failed; answer cache falls back to exact matches", exc_info=True)
+            self.embed = None
+            return None
+
+    def get(self, doc_hash, question, semantic=True):
+        """Return a ``CachedAnswer`` for ``question`` on ``doc_hash``, or ``None``.
+
+        With ``semantic`` false only the exact normalized question matches.
+        """
+        key = (doc_hash, normalize_question(question))
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return CachedAnswer(entry.answer, entry.confidence, entry.sources)
+            candidates = list(self._by_doc.get(doc_hash, ()))
+        if not semantic or self.embed is None or not candidates:
+            return None
+
+        vector = self._embed(key[1])
+        if vector is None:
+            return None
+        with self._lock:
+            live = [(other, self._live(other, now)) for other in candidates]
+            pending = [other for other, entry in live if entry is not None and entry.vector is None]
+        # Entries are stored without vectors; embed them on the first lookup that needs them.
+        for other in pending:
+            other_vector = self._embed(other[1])
+            if other_vector is None:
+                return None
+            with self._lock:
+                if other in self._entries:
+                    self._entries[other].vector = other_vector
+        with self._lock:
+            best_key, best = None, self.threshold
+            for other in candidates:
+                entry = self._live(other, now)
+                if entry is None or entry.vector is None:
+                    continue
+                similarity = float(entry.vector @ vector)
+                if similarity >= best:
+                    best_key, best = other, similarity
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            entry = self._entries[best_key]
+            return CachedAnswer(entry.answer, entry.confidence, entry.sources, similarity=best)
+
+    def put(self, doc_hash, question, answer, confidence, sources=""):
+        key = (doc_hash, normalize_question(question))
+        with self._lock:
+            self._entries[key] = CachedAnswer(answer, confidence, sources)
+            self._entries.move_to_end(key)
+            self._by_doc.setdefault(doc_hash, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
@@ -0,0 +1,190 @@
+"""Pre-process a folder of syllabus PDFs from the command line.
+
+    python -m smriti.batch syllabi/ [--out .cache/batch] [--concurrency 4]
+
+PDFs are extracted across the shared process pool, and the syllabus analyses
+then run through the LLM gateway with at most ``--concurrency`` requests in
+flight. Every answer goes to the response cache, so the same PDF uploaded on
+the Ingestion page later is answered instantly. Results are also written to
+``<out>/<hash>.json``. ``<out>/manifest.json`` records finished documents,
+so an interrupted run picks up where it stopped.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from smriti.budget import join_pages
+from smriti.doc_cache import file_hash, get_document_cache
+from smriti.gateway import LLMGateway, load_provider, provider_ready
+from smriti.pdf_extract import WORKERS, extract_document, get_pool, hash_key
+from smriti.syllabus import ANALYSES, analyze
+
+OUTPUT_DIR = os.path.join(".cache", "batch")
+CONCURRENCY = 4
+# Extractions queued on the process pool at once; the rest wait their turn on disk.
+MAX_EXTRACTIONS = 2 * WORKERS
+
+
+def write_json(path, payload):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def read_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+class BatchRun:
+    def __init__(self, llm, out_dir=OUTPUT_DIR, concurrency=CONCURRENCY, analyses=tuple(ANALYSES)):
+        self.llm = llm
+        self.out_dir = out_dir
+        self.concurrency = concurrency
+        self.analyses = list(analyses)
+        self.manifest_path = os.path.join(out_dir, "manifest.json")
+        os.makedirs(out_dir, exist_ok=True)
+        self.manifest = read_json(self.manifest_path, {})
+        self.already_done = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def fail(self, path, reason):
+        self.failed += 1
+        print(f"fail  {path}: {reason}", file=sys.stderr)
+
+    def pending(self, paths):
+        """Pair each PDF with its hash, skipping documents already finished."""
+        for path in paths:
+            try:
+                doc_hash = file_hash(path)
+            except OSError as exc:
+                self.fail(path, exc)
+                continue
+            entry = self.manifest.get(doc_hash)
+            if entry and set(self.analyses) <= set(entry["analyses"]):
+                self.already_done += 1
+                continue
+            yield path, doc_hash
+
+    def _collect(self, futures):
+        """Yield the extractions in ``futures`` that finish next, removing them from it."""
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            path, doc_hash, key = futures.pop(future)
+            try:
+                pages = future.result()
+            except Exception as exc:
+                self.fail(path, exc)
+                continue
+            get_document_cache().put(key, pages)
+            yield path, doc_hash, pages
+
+    def extract(self, docs):
+        """Yield ``(path, hash, pages)`` as each document's text becomes available.
+
+        Workers read the PDFs from disk, and at most ``MAX_EXTRACTIONS`` are
+        queued at once, so a large folder is never held in memory. A
+        document that cannot be read is reported as failed and skipped.
+        """
+        cache = get_document_cache()
+        pool = get_pool()
+        futures = {}
+        for path, doc_hash in docs:
+            key = hash_key(doc_hash)
+            pages = cache.get(key)
+            if pages is not None:
+                yield path, doc_hash, pages
+                continue
+            if len(futures) >= MAX_EXTRACTIONS:
+                yield from self._collect(futures)
+            futures[pool.submit(extract_document, path)] = (path, doc_hash, key)
+        while futures:
+            yield from self._collect(futures)
+
+    def save(self, path, doc_hash, name, result):
+        """Record one finished analysis; returns True once the whole document is done."""
+        with self._lock:
+            out_path = os.path.join(self.out_dir, f"{doc_hash}.json")
+            record = read_json(out_path, {"file": os.path.basename(path), "hash": doc_hash, "analyses": {}})
+            record["analyses"][name] = result
+            write_json(out_path, record)
+            if not set(self.analyses) <= set(record["analyses"]):
+                return False
+            self.manifest[doc_hash] = {"file": path, "analyses": sorted(record["analyses"]), "finished": time.time()}
+            write_json(self.manifest_path, self.manifest)
+            return True
+
+    def run(self, paths):
+        start = time.monotonic()
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as workers:
+            futures = {}
+            for path, doc_hash, pages in self.extract(self.pending(paths)):
+                text = join_pages(pages)
+                if not text.strip():
+                    print(f"skip  {path}: no readable text", file=sys.stderr)
+                    continue
+                existing = read_json(os.path.join(self.out_dir, f"{doc_hash}.json"), {}).get("analyses", {})
+                for name in self.analyses:
+                    if name not in existing:
+                        futures[workers.submit(analyze, self.llm, name, text)] = (path, doc_hash, name)
+
+            for future in as_completed(futures):
+                path, doc_hash, name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    self.fail(f"{path} [{name}]", exc)
+                    continue
+                if self.save(path, doc_hash, name, result):
+                    done += 1
+                    minutes = (time.monotonic() - start) / 60
+                    print(f"done  {path} ({done / minutes:.1f} docs/min)")
+        return done, self.failed, time.monotonic() - start
+
+
+def find_pdfs(directory):
+    return sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(directory)
+        for name in files
+        if name.lower().endswith(".pdf")
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m smriti.batch", description="Pre-process a folder of syllabus PDFs.")
+    parser.add_argument("directory", help="folder to scan for PDFs (recursively)")
+    parser.add_argument("--out", default=OUTPUT_DIR, help=f"output folder (default: {OUTPUT_DIR})")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="LLM requests in flight at once")
+    parser.add_argument("--analyses", default=",".join(ANALYSES), help="comma-separated subset of: " + ", ".join(ANALYSES))
+    args = parser.parse_args(argv)
+
+    analyses = [name.strip() for name in args.analyses.split(",") if name.strip()]
+    unknown = set(analyses) - set(ANALYSES)
+    if unknown:
+        parser.error(f"unknown analyses: {', '.join(sorted(unknown))}")
+    if not provider_ready():
+        parser.error("GROQ_API_KEY is not set (or set SMRITI_LLM_PROVIDER=fake)")
+
+    paths = find_pdfs(args.directory)
+    run = BatchRun(LLMGateway(load_provider()), args.out, args.concurrency, analyses)
+    done, failed, seconds = run.run(paths)
+    print(
+        f"{done} of {len(paths)} documents processed ({run.already_done} already done), {failed} failed "
+        f"in {seconds:.1f}s ({done / (seconds / 60) if seconds else 0:.1f} docs/min)"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
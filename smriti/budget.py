@@ -0,0 +1,116 @@
+"""Fitting uploaded documents into a prompt's token budget.
+
+Extracted pages are joined with a ``PAGE_BREAK`` between them, which is
+turned back into a plain newline before the text reaches a prompt.
+Documents that already fit are otherwise passed through untouched. Oversized
+ones are compressed first: running headers and footers that repeat at the
+top or bottom of the pages are kept once, page numbers and boilerplate lines
+are dropped, and blank runs are collapsed. Whatever still overflows is cut
+from the middle, keeping the start and end of the document.
+"""
+import logging
+import re
+from collections import Counter
+
+from smriti.tokens import get_encoding
+
+logger = logging.getLogger(__name__)
+
+PAGE_BREAK = "\f"
+REPEAT_THRESHOLD = 3
+EDGE_LINES = 2
+MAX_HEADER_CHARS = 120
+HEAD_SHARE = 0.75
+
+PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+PAGE_FOOTER_RE = re.compile(r"\bpage\s*\d+(\s*(of|/)\s*\d+)?\b", re.IGNORECASE)
+FOOTER_MAX_WORDS = 8
+BOILERPLATE_RE = re.compile(
+    r"(©|\(c\)\s*\d{4}|all rights reserved|confidential|printed on|downloaded from)",
+    re.IGNORECASE
+)
+RULE_RE = re.compile(r"^[\W_]+$")
+
+
+def join_pages(pages):
+    """Join extracted pages, marking where each one ends so ``compress`` can find its edges."""
+    return "".join(page + PAGE_BREAK for page in pages if page)
+
+
+def _is_boilerplate(line):
+    if PAGE_NUMBER_RE.match(line) or RULE_RE.match(line) or BOILERPLATE_RE.search(line):
+        return True
+    return len(line.split()) <= FOOTER_MAX_WORDS and PAGE_FOOTER_RE.search(line) is not None
+
+
+def _edges(lines):
+    """Map the index of each line near the top or bottom of a page to its position there."""
+    body = [i for i, line in enumerate(lines) if line and not _is_boilerplate(line)]
+    edges = {i: -(n + 1) for n, i in enumerate(reversed(body[-EDGE_LINES:]))}
+    edges.update((i, n) for n, i in enumerate(body[:EDGE_LINES]))
+    return edges
+
+
+def _running_lines(pages):
+    """Return ``(position, line)`` pairs repeated on enough pages to be a header or footer."""
+    counts = Counter()
+    for lines in pages:
+        counts.update(
+            (position, lines[i].lower()) for i, position in _edges(lines).items()
+            if len(lines[i]) <= MAX_HEADER_CHARS
+        )
+    needed = max(REPEAT_THRESHOLD, (len(pages) + 1) // 2)
+    return {key for key, count in counts.items() if count >= needed}
+
+
+def compress(text):
+    """Drop running headers/footers, page numbers and boilerplate lines.
+
+    Pages are separated by ``PAGE_BREAK``. A line counts as a header or
+    footer only when it sits at the same place near the top or bottom of
+    most pages, so repeated rows and labels in the body are left alone.
+    """
+    pages = [[line.strip() for line in page.splitlines()] for page in text.split(PAGE_BREAK)]
+    running = _running_lines(pages)
+    seen = set()
+    kept = []
+    for lines in pages:
+        edges = _edges(lines)
+        for i, line in enumerate(lines):
+            if not line:
+                if kept and kept[-1]:
+                    kept.append("")
+                continue
+            if _is_boilerplate(line):
+                continue
+            key = line.lower()
+            if i in edges and (edges[i], key) in running:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def fit_to_budget(text, max_tokens, label="document"):
+    """Return ``text`` trimmed to at most ``max_tokens`` tokens, logging what was saved."""
+    encoding = get_encoding()
+    original = len(encoding.encode(text))
+    if original <= max_tokens:
+        return text.replace(PAGE_BREAK, "\n")
+
+    text = compress(text)
+    tokens = encoding.encode(text)
+    if len(tokens) > max_tokens:
+        marker = "\n\n[... middle of document omitted to fit the prompt budget ...]\n\n"
+        room = max(0, max_tokens - len(encoding.encode(marker)))
+        head = int(room * HEAD_SHARE)
+        tail = room - head
+        text = (
+            encoding.decode(tokens[:head]).rstrip()
+            + marker
+            + (encoding.decode(tokens[-tail:]).lstrip() if tail else "")
+        )
+    fitted = len(encoding.encode(text))
+    logger.info("%s: %d -> %d tokens (saved %d)", label, original, fitted, original - fitted)
+    return text
@@ -0,0 +1,101 @@
+"""Persistent Tutor chat threads and messages in SQLite.
+
+Messages are keyed by ``(thread_id, seq)`` so the page can load just the
+most recent window of the active thread and page backwards on demand.
+Threads and messages belong to a user, and every query is scoped to one.
+"""
+from smriti.storage import DEFAULT_USER, add_column, connection, ensure_schema, transaction
+
+
+def _create_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chat_threads (
+            thread_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL DEFAULT 'default',
+            name TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            thread_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            role TEXT,
+            content TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_chat_messages_thread_seq ON chat_messages (thread_id, seq)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chat_threads_user_updated ON chat_threads (user_id, updated_at)"
+    )
+
+
+def _add_message_owner(conn):
+    add_column(conn, "chat_messages", "user_id", f"TEXT NOT NULL DEFAULT '{DEFAULT_USER}'")
+    conn.execute("""
+        UPDATE chat_messages SET user_id = (
+            SELECT user_id FROM chat_threads WHERE chat_threads.thread_id = chat_messages.thread_id
+        ) WHERE thread_id IN (SELECT thread_id FROM chat_threads)
+    """)
+
+
+def init_chat_db():
+    ensure_schema("chat", [_create_tables, _add_message_owner])
+
+
+def create_thread(thread_id, name, user_id=DEFAULT_USER):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO chat_threads (thread_id, user_id, name) VALUES (?, ?, ?)",
+            (thread_id, user_id, name)
+        )
+
+
+def count_threads(user_id=DEFAULT_USER):
+    with connection() as conn:
+        (count,) = conn.execute(
+            "SELECT COUNT(*) FROM chat_threads WHERE user_id = ?", (user_id,)
+        ).fetchone()
+    return count
+
+
+def list_threads(user_id=DEFAULT_USER, limit=10, offset=0):
+    """Return ``(thread_id, name)`` pairs, most recently active first."""
+    with connection() as conn:
+        return conn.execute(
+            "SELECT thread_id, name FROM chat_threads WHERE user_id = ? "
+            "ORDER BY updated_at DESC, rowid DESC LIMIT ? OFFSET ?",
+            (user_id, limit, offset)
+        ).fetchall()
+
+
+def append_message(thread_id, role, content, user_id=DEFAULT_USER):
+    """Store a message at the end of ``thread_id`` and return its ``seq``."""
+    with transaction() as conn:
+        c = conn.execute(
+            "INSERT INTO chat_messages (thread_id, user_id, seq, role, content) "
+            "SELECT ?, ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM chat_messages WHERE thread_id = ?",
+            (thread_id, user_id, role, content, thread_id)
+        )
+        (seq,) = conn.execute("SELECT seq FROM chat_messages WHERE id = ?", (c.lastrowid,)).fetchone()
+        conn.execute(
+            "UPDATE chat_threads SET updated_at = CURRENT_TIMESTAMP WHERE thread_id = ? AND user_id = ?",
+            (thread_id, user_id)
+        )
+    return seq
+
+
+def recent_messages(thread_id, limit=20, before_seq=None, user_id=DEFAULT_USER):
+    """Return up to ``limit`` messages older than ``before_seq`` (or the newest), oldest first."""
+    with connection() as conn:
+        data = conn.execute(
+            "SELECT seq, role, content FROM chat_messages "
+            "WHERE thread_id = ? AND user_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (thread_id, user_id, before_seq if before_seq is not None else 2 ** 62, limit)
+        ).fetchall()
+    return [{"seq": seq, "role": role, "content": content} for seq, role, content in reversed(data)]
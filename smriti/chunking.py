@@ -0,0 +1,99 @@
+"""Splitting note text into token-measured retrieval chunks.
+
+Chunks are filled sentence by sentence up to a token budget, preferring to
+close at a paragraph break once they are mostly full, and carry a few
+trailing sentences over as overlap. Each sentence is encoded exactly once,
+so chunking is a single linear pass over the document.
+"""
+import re
+from dataclasses import dataclass
+
+from smriti.tokens import get_encoding
+
+MAX_TOKENS = 512
+OVERLAP_TOKENS = 64
+PARAGRAPH_FILL = 0.75
+
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class Chunk:
+    text: str
+    page_start: int
+    page_end: int
+    tokens: int
+
+
+class TokenChunker:
+    def __init__(self, max_tokens=MAX_TOKENS, overlap=OVERLAP_TOKENS):
+        self.max_tokens = max_tokens
+        self.overlap = min(overlap, max_tokens // 2)
+        self.encoding = get_encoding()
+        self._units = []
+        self._tokens = 0
+        self._fresh = 0
+
+    def _emit(self):
+        chunk = Chunk(
+            text=" ".join(text for text, _, _ in self._units),
+            page_start=self._units[0][2],
+            page_end=self._units[-1][2],
+            tokens=self._tokens,
+        )
+        carried, carried_tokens = [], 0
+        for unit in reversed(self._units):
+            if carried_tokens + unit[1] > self.overlap:
+                break
+            carried.insert(0, unit)
+            carried_tokens += unit[1]
+        self._units, self._tokens, self._fresh = carried, carried_tokens, 0
+        return chunk
+
+    def _pieces(self, sentence):
+        tokens = self.encoding.encode(sentence)
+        if len(tokens) <= self.max_tokens:
+            yield sentence, len(tokens)
+            return
+        step = self.max_tokens - self.overlap
+        for start in range(0, len(tokens), step):
+            piece = tokens[start:start + self.max_tokens]
+            yield self.encoding.decode(piece).strip(), len(piece)
+
+    def feed(self, page, text):
+        """Add the text of ``page`` and yield every chunk that is now complete."""
+        for paragraph in PARAGRAPH_RE.split(text):
+            for sentence in SENTENCE_RE.split(paragraph.strip()):
+                sentence = " ".join(sentence.split())
+                if not sentence:
+                    continue
+                for piece, n in self._pieces(sentence):
+                    if self._fresh and self._tokens + n > self.max_tokens:
+                        yield self._emit()
+                        # Overlap must never push a fresh unit past the budget.
+                        while self._units and self._tokens + n > self.max_tokens:
+                            self._tokens -= self._units.pop(0)[1]
+                    self._units.append((piece, n, page))
+                    self._tokens += n
+                    self._fresh += 1
+            if self._fresh and self._tokens >= self.max_tokens * PARAGRAPH_FILL:
+                yield self._emit()
+
+    def flush(self):
+        """Return the final partial chunk, if it holds anything new."""
+        if not self._fresh:
+            return None
+        chunk = self._emit()
+        self._units, self._tokens = [], 0
+        return chunk
+
+
+def iter_chunks(pages, max_tokens=MAX_TOKENS, overlap=OVERLAP_TOKENS):
+    """Chunk a stream of page texts, yielding each ``Chunk`` as soon as it is complete."""
+    chunker = TokenChunker(max_tokens, overlap)
+    for page, text in enumerate(pages):
+        yield from chunker.feed(page, text)
+    last = chunker.flush()
+    if last is not None:
+        yield last
@@ -0,0 +1,85 @@
+"""Content-addressed on-disk cache of per-page PDF text.
+
+Entries are keyed by the SHA-256 of the uploaded bytes (plus the extractor
+variant), so a rerun or a repeat upload of the same file skips parsing.
+Least-recently-used entries are evicted once the cache exceeds its byte budget.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+CACHE_DIR = os.path.join(".cache", "documents")
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def document_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path, block_size=1024 * 1024):
+    """``document_hash`` of a file's contents, read in blocks rather than all at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                pages = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return pages
+
+    def put(self, key, pages):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.root):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_document_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = DocumentCache()
+        return _default_cache
+
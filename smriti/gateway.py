@@ -0,0 +1,277 @@
+"""Single entry point for every LLM call in the app.
+
+One ``LLMGateway`` per process (cached with ``st.cache_resource``) owns the
+backend chosen by ``SMRITI_LLM_PROVIDER``: ``groq`` (default) keeps a pooled
+keep-alive HTTP client so pages no longer pay connection setup and TLS
+handshakes on each call, while ``fake`` answers locally without a key or
+network access. Requests pass through a rate-limit-aware scheduler sized to
+the account's quotas. Model, timeout, priority, response caching and the
+token budget for interpolated documents are configured per call site in
+``CALL_SITES``, keyed ``"<page>.<function>"``. Identical cacheable requests
+already in flight are shared rather than repeated. Every call is timed and
+its tokens counted into ``smriti.metrics``.
+"""
+import os
+import threading
+import weakref
+
+import streamlit as st
+
+from smriti.budget import fit_to_budget
+from smriti.metrics import CallTimer, get_metrics
+from smriti.providers import FakeProvider, GroqProvider
+from smriti.response_cache import ResponseCache, cache_key
+from smriti.scheduler import BATCH as BATCH_PRIORITY, INTERACTIVE as INTERACTIVE_PRIORITY, RequestScheduler
+from smriti.singleflight import FlightFailed, SingleFlight
+from smriti.tokens import count_tokens
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+DEFAULT_TIMEOUT = 60.0
+PROVIDER = os.environ.get("SMRITI_LLM_PROVIDER", "groq").lower()
+FAKE_LATENCY = float(os.environ.get("SMRITI_FAKE_LATENCY", "0.5"))
+FAKE_TOKEN_DELAY = float(os.environ.get("SMRITI_FAKE_TOKEN_DELAY", "0.01"))
+REQUESTS_PER_MINUTE = int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", "30"))
+TOKENS_PER_MINUTE = int(os.environ.get("GROQ_TOKENS_PER_MINUTE", "6000"))
+UNLIMITED_PER_MINUTE = 10 ** 9
+COMPLETION_ESTIMATE = 512
+DOCUMENT_BUDGET = 4000
+
+INTERACTIVE = {"timeout": 30.0, "priority": INTERACTIVE_PRIORITY}
+BATCH = {"timeout": 90.0, "priority": BATCH_PRIORITY}
+# Only deterministic extractions share the response cache; generated plans,
+# questions and summaries should vary when the student asks again.
+CACHED = {**BATCH, "cache": True}
+
+CALL_SITES = {
+    "memory.feedback_agent": INTERACTIVE,
+    "ingestion.extract_topics": CACHED,
+    "ingestion.suggest_resources": CACHED,
+    "ingestion.give_tips": CACHED,
+    "ingestion.generate_study_plan": CACHED,
+    "timetable.parse_timetable": {**CACHED, "doc_budget": 3000},
+    "timetable.generate_plan": BATCH,
+    "timetable.explain_plan": BATCH,
+    "timetable.map_topics_to_free_slots": BATCH,
+    "timetable.chat": INTERACTIVE,
+    "tutor.answer_question": INTERACTIVE,
+    "tutor.summarize_section": {**BATCH, "doc_budget": 3000},
+    "tutor.merge_summaries": BATCH,
+    "exam.quick_revision": BATCH,
+    "exam.mind_map_structure": {**CACHED, "doc_budget": 3000},
+    "exam.practice_questions": BATCH,
+    "exam.exam_strategy": BATCH,
+    "exam.evaluate_answers": INTERACTIVE,
+    "motivation.groq_response": {"timeout": 20.0, "priority": INTERACTIVE_PRIORITY},
+    "skill.challenge": INTERACTIVE,
+    "skill.feedback": INTERACTIVE,
+}
+
+
+def site_config(site):
+    config = {
+        "model": DEFAULT_MODEL,
+        "timeout": DEFAULT_TIMEOUT,
+        "cache": False,
+        "priority": BATCH_PRIORITY,
+        "doc_budget": DOCUMENT_BUDGET,
+    }
+    config.update(CALL_SITES.get(site, {}))
+    return config
+
+
+def fit_document(text, site):
+    """Trim a document to the token budget of the call site it is about to be sent to."""
+    return fit_to_budget(text, site_config(site)["doc_budget"], label=site)
+
+
+def get_api_key():
+    try:
+        key = st.secrets.get("GROQ_API_KEY")
+    except Exception:
+        key = None
+    return key or os.environ.get("GROQ_API_KEY")
+
+
+def provider_ready():
+    """Whether LLM calls can be made: the local provider needs no key."""
+    return PROVIDER == "fake" or bool(get_api_key())
+
+
+def load_provider():
+    if PROVIDER == "fake":
+        return FakeProvider(latency=FAKE_LATENCY, token_delay=FAKE_TOKEN_DELAY)
+    if PROVIDER != "groq":
+        raise ValueError(f"Unknown SMRITI_LLM_PROVIDER: {PROVIDER!r}")
+    return GroqProvider(get_api_key())
+
+
+class LLMGateway:
+    def __init__(self, provider):
+        self.provider = provider
+        self.cache = ResponseCache()
+        self.metrics = get_metrics()
+        self.flights = SingleFlight()
+        if provider.name == "fake":
+            # No quota to respect, but the scheduler stays in the path so its overhead is measured.
+            self.scheduler = RequestScheduler(UNLIMITED_PER_MINUTE, UNLIMITED_PER_MINUTE)
+        else:
+            self.scheduler = RequestScheduler(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+
+    def chat(self, messages, site=None, stream=False, cache=None, **params):
+        """Run a chat completion; returns the text, or a token generator when ``stream``.
+
+        ``cache`` overrides the call site's response-cache setting for this call.
+        """
+        config = site_config(site)
+        timer = CallTimer(self.metrics, site, self.provider.name, stream)
+        use_cache = config["cache"] if cache is None else cache
+        key = None
+        if use_cache:
+            # Namespaced by provider so fake replies never answer real requests.
+            model = f"{self.provider.name}:{config['model']}"
+            key = cache_key(model, messages, params.get("temperature"), params.get("max_tokens"))
+            cached = self.cache.get(key)
+            if cached is not None:
+                timer.finish(cache_hit=True)
+                return iter([cached]) if stream else cached
+
+            flight, leader = self.flights.join(key)
+            if not leader:
+                def fallback():
+                    return self._request(messages, config, stream, params, timer, key)
+                follow = self._follow_stream if stream else self._follow
+                return follow(flight, config["timeout"], timer, fallback)
+            return self._request(messages, config, stream, params, timer, key, flight)
+
+        return self._request(messages, config, stream, params, timer)
+
+    def _request(self, messages, config, stream, params, timer, key=None, flight=None):
+        request = dict(model=config["model"], messages=messages, timeout=config["timeout"], **params)
+        prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+        estimate = prompt_tokens + (params.get("max_tokens") or COMPLETION_ESTIMATE)
+        usage = {}
+        try:
+            response = self.scheduler.run(
+                lambda: self.provider.create(stream=stream, usage=usage, **request),
+                priority=config["priority"],
+                tokens=estimate
+            )
+        except Exception as exc:
+            timer.finish(prompt_tokens=prompt_tokens, error=type(exc).__name__)
+            if flight:
+                self.flights.leave(key, flight, exc)
+            raise
+        if stream:
+            tokens = self._finish_stream(response, key, flight, timer, usage, prompt_tokens)
+            if flight:
+                # A generator that is dropped before it starts never runs its
+                # ``finally``; release the flight when it is collected instead.
+                weakref.finalize(tokens, self.flights.leave, key, flight, FlightFailed("stream never started"))
+            return tokens
+        try:
+            if key:
+                self.cache.put(key, response)
+        finally:
+            # Followers must be released even if the cache write fails.
+            if flight:
+                flight.publish(response)
+                self.flights.leave(key, flight)
+            timer.finish(
+                prompt_tokens=usage.get("prompt_tokens", prompt_tokens),
+                completion_tokens=usage.get("completion_tokens") or count_tokens(response),
+            )
+        return response
+
+    def _finish_stream(self, tokens, key, flight, timer, usage, prompt_tokens):
+        parts = []
+        error = None
+        complete = False
+        handed_off = False
+        try:
+            for token in tokens:
+                timer.mark_first_token()
+                parts.append(token)
+                if flight:
+                    flight.publish(token)
+                yield token
+            complete = True
+        except GeneratorExit:
+            if flight:
+                # The leading page went away mid-answer (a rerun, a click). Its
+                # followers are still relaying, so finish the stream for them.
+                threading.Thread(
+                    target=self._drain_stream,
+                    args=(tokens, parts, key, flight, timer, usage, prompt_tokens),
+                    daemon=True
+                ).start()
+                handed_off = True
+            raise
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            if not handed_off:
+                self._settle_stream(parts, complete, error, key, flight, timer, usage, prompt_tokens)
+
+    def _drain_stream(self, tokens, parts, key, flight, timer, usage, prompt_tokens):
+        error = None
+        complete = False
+        try:
+            for token in tokens:
+                parts.append(token)
+                flight.publish(token)
+            complete = True
+        except Exception as exc:
+            error = exc
+        finally:
+            self._settle_stream(parts, complete, error, key, flight, timer, usage, prompt_tokens)
+
+    def _settle_stream(self, parts, complete, error, key, flight, timer, usage, prompt_tokens):
+        # A stream that failed or was abandoned halfway is still measured but never cached.
+        text = "".join(parts)
+        try:
+            if key and complete:
+                self.cache.put(key, text)
+        finally:
+            if flight:
+                self.flights.leave(key, flight, None if complete else error or FlightFailed("stream abandoned"))
+            timer.finish(
+                prompt_tokens=usage.get("prompt_tokens", prompt_tokens),
+                completion_tokens=usage.get("completion_tokens") or count_tokens(text),
+                error=type(error).__name__ if error else None,
+            )
+
+    def _follow(self, flight, timeout, timer, fallback):
+        # If the leader fails or stalls, make the call ourselves rather than share its failure.
+        try:
+            text = flight.result(timeout)
+        except (FlightFailed, TimeoutError):
+            return fallback()
+        timer.finish(shared=True)
+        return text
+
+    def _follow_stream(self, flight, timeout, timer, fallback):
+        relayed = False
+        try:
+            for part in flight.stream(timeout):
+                timer.mark_first_token()
+                relayed = True
+                yield part
+        except (FlightFailed, TimeoutError):
+            if relayed:
+                raise
+            yield from fallback()
+            return
+        timer.finish(shared=True)
+
+    def complete(self, prompt, system, site=None, stream=False, **params):
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+        return self.chat(messages, site=site, stream=stream, **params)
+
+
+@st.cache_resource
+def get_gateway():
+    return LLMGateway(load_provider())
@@ -0,0 +1,58 @@
+"""Background ingestion of an uploaded document for the Tutor.
+
+A worker thread consumes the page stream from ``smriti.pdf_extract``, chunks
+it incrementally and adds every chunk to a BM25 index as it goes, so early
+pages are searchable while later ones are still being parsed.
+"""
+import threading
+
+from smriti.chunking import MAX_TOKENS, OVERLAP_TOKENS, iter_chunks
+from smriti.pdf_extract import iter_pages
+from smriti.retrieval import BM25Index
+
+
+class IngestJob:
+    def __init__(self, data, max_tokens=MAX_TOKENS, overlap=OVERLAP_TOKENS):
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.pages = []
+        self._chunks = []
+        self.total_pages = 0
+        self.index = BM25Index()
+        self.done = False
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, args=(data,), daemon=True)
+        self._thread.start()
+
+    def _page_stream(self, data):
+        for _, total, text in iter_pages(data):
+            with self._lock:
+                self.total_pages = total
+                self.pages.append(text)
+            yield text
+
+    def _run(self, data):
+        try:
+            for chunk in iter_chunks(self._page_stream(data), self.max_tokens, self.overlap):
+                with self._lock:
+                    self._chunks.append(chunk)
+                    self.index.add([chunk.text])
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.done = True
+
+    @property
+    def pages_done(self):
+        return len(self.pages)
+
+    @property
+    def chunks(self):
+        with self._lock:
+            return list(self._chunks)
+
+    def search(self, question, k=3):
+        """Return up to ``k`` ``(chunk_id, score)`` pairs over the chunks indexed so far."""
+        with self._lock:
+            return self.index.search(question, k)
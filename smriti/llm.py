@@ -0,0 +1,21 @@
+"""Helpers for talking to the chat completions API."""
+
+
+def read_usage(report, usage):
+    """Copy token counts from an API usage report into the ``usage`` dict."""
+    if report is not None and usage is not None:
+        usage["prompt_tokens"] = report.prompt_tokens
+        usage["completion_tokens"] = report.completion_tokens
+
+
+def stream_text(stream, usage=None):
+    """Yield the text of an already-opened completion stream as tokens arrive.
+
+    Pass the result to ``st.write_stream``, which renders it progressively
+    and returns the full text once the stream ends. Groq reports token usage
+    on the final chunk; it is copied into ``usage`` when one is given.
+    """
+    for chunk in stream:
+        read_usage(getattr(getattr(chunk, "x_groq", None), "usage", None), usage)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
@@ -0,0 +1,187 @@
+"""Per-call instrumentation of LLM requests.
+
+The gateway records one ``CallRecord`` per call: latency (and time to first
+token when streaming), prompt and completion tokens, whether the response
+cache answered it or it shared an identical in-flight request, and any
+error. Records go to an in-process ring buffer and, when
+``SMRITI_METRICS_DB`` names a file, to an ``llm_metrics`` table there so
+history survives restarts and is shared between processes.
+"""
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import astuple, dataclass, fields
+
+from smriti.storage import add_column, connection, ensure_schema, transaction
+
+BUFFER_SIZE = 4096
+METRICS_DB = os.environ.get("SMRITI_METRICS_DB") or None
+
+
+@dataclass
+class CallRecord:
+    created: float
+    site: str
+    provider: str
+    latency: float
+    first_token: float = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_hit: bool = False
+    shared: bool = False
+    stream: bool = False
+    error: str = None
+
+    @property
+    def page(self):
+        return self.site.split(".", 1)[0]
+
+
+COLUMNS = [f.name for f in fields(CallRecord)]
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of ``values`` for ``q`` in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(records):
+    """Latency percentiles, hit and error rates over a list of records."""
+    calls = len(records)
+    # Cache hits never reach the model, so they would flatter the latency figures.
+    latencies = [r.latency for r in records if not r.cache_hit and not r.error]
+    hits = sum(r.cache_hit for r in records)
+    shared = sum(r.shared for r in records)
+    errors = sum(bool(r.error) for r in records)
+    return {
+        "calls": calls,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "prompt_tokens": sum(r.prompt_tokens for r in records),
+        "completion_tokens": sum(r.completion_tokens for r in records),
+        "cache_hit_rate": hits / calls if calls else 0.0,
+        "shared_rate": shared / calls if calls else 0.0,
+        "error_rate": errors / calls if calls else 0.0,
+    }
+
+
+def group_by(records, key):
+    groups = {}
+    for record in records:
+        groups.setdefault(key(record), []).append(record)
+    return {name: summarize(group) for name, group in sorted(groups.items())}
+
+
+class MetricsRecorder:
+    def __init__(self, capacity=BUFFER_SIZE, db_path=METRICS_DB):
+        self._buffer = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            ensure_schema("llm_metrics", [self._create_table, self._add_shared], db_path)
+
+    @staticmethod
+    def _create_table(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created REAL NOT NULL,
+                site TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                latency REAL NOT NULL,
+                first_token REAL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                cache_hit INTEGER NOT NULL,
+                stream INTEGER NOT NULL,
+                error TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_metrics_created ON llm_metrics (created)")
+
+    @staticmethod
+    def _add_shared(conn):
+        add_column(conn, "llm_metrics", "shared", "INTEGER NOT NULL DEFAULT 0")
+
+    def record(self, record):
+        with self._lock:
+            self._buffer.append(record)
+        if self.db_path:
+            with transaction(self.db_path) as conn:
+                conn.execute(
+                    f"INSERT INTO llm_metrics ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    astuple(record)
+                )
+
+    def recent(self):
+        """Records held in this process, oldest first."""
+        with self._lock:
+            return list(self._buffer)
+
+    def history(self, since=None):
+        """Records from the metrics table, optionally only those after ``since``."""
+        if not self.db_path:
+            return []
+        with connection(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM llm_metrics WHERE created >= ? ORDER BY created",
+                (since or 0.0,)
+            ).fetchall()
+        return [CallRecord(*row) for row in rows]
+
+    def clear(self):
+        with self._lock:
+            self._buffer.clear()
+
+
+class CallTimer:
+    """Measures one call and hands the finished record to a recorder."""
+
+    def __init__(self, recorder, site, provider, stream=False):
+        self.recorder = recorder
+        self.site = site or "unknown"
+        self.provider = provider
+        self.stream = stream
+        self.created = time.time()
+        self.start = time.perf_counter()
+        self.first_token = None
+
+    def mark_first_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.start
+
+    def finish(self, prompt_tokens=0, completion_tokens=0, cache_hit=False, shared=False, error=None):
+        self.recorder.record(CallRecord(
+            created=self.created,
+            site=self.site,
+            provider=self.provider,
+            latency=time.perf_counter() - self.start,
+            first_token=self.first_token,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cache_hit=cache_hit,
+            shared=shared,
+            stream=self.stream,
+            error=error,
+        ))
+
+
+_default_recorder = None
+_default_lock = threading.Lock()
+
+
+def get_metrics():
+    global _default_recorder
+    with _default_lock:
+        if _default_recorder is None:
+            _default_recorder = MetricsRecorder()
+        return _default_recorder
@@ -0,0 +1,150 @@
+"""Page-level PDF text extraction shared by every page.
+
+Each page is read with pypdf first (fast) and falls back to pdfplumber
+(layout and table aware) when pypdf finds no text. Large documents are split
+into page ranges and extracted across a process pool, then yielded in page
+order as soon as each range is ready, so callers can start work on early
+pages while later ones are still being parsed. The document is written to a
+temporary file once and workers open it by path, rather than every range
+task carrying a pickled copy of the whole PDF.
+"""
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from smriti.doc_cache import document_hash, get_document_cache
+
+PARALLEL_MIN_PAGES = 16
+WORKERS = os.cpu_count() or 1
+BATCHES_PER_WORKER = 4
+MIN_RANGE_PAGES = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        # A worker that dies (killed for memory, a crashing parser) breaks the
+        # whole executor for good; replace it instead of failing every later PDF.
+        if _pool is not None and getattr(_pool, "_broken", False):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            # spawn, not fork: Streamlit's server process is multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=get_context("spawn"))
+        return _pool
+
+
+def _source(data):
+    """``data`` as something pypdf and pdfplumber can open: a path, or the bytes in memory."""
+    return data if isinstance(data, str) else io.BytesIO(data)
+
+
+def page_count(data):
+    from pypdf import PdfReader
+    return len(PdfReader(_source(data)).pages)
+
+
+def _plumber_page(page, tables):
+    text = page.extract_text()
+    if text or not tables:
+        return text or ""
+    table = page.extract_table()
+    if not table:
+        return ""
+    return "\n".join(" | ".join(cell if cell else "" for cell in row) for row in table)
+
+
+def iter_range(data, start, stop, tables=False):
+    from pypdf import PdfReader
+
+    reader = PdfReader(_source(data))
+    plumber = None
+    try:
+        for number in range(start, stop):
+            try:
+                text = reader.pages[number].extract_text() or ""
+            except Exception:
+                text = ""
+            if not text.strip():
+                if plumber is None:
+                    import pdfplumber
+                    plumber = pdfplumber.open(_source(data))
+                text = _plumber_page(plumber.pages[number], tables)
+            yield text.strip()
+    finally:
+        if plumber is not None:
+            plumber.close()
+
+
+def extract_range(data, start, stop, tables=False):
+    """Extract pages ``[start, stop)`` of ``data`` (bytes or a file path); runs inside pool workers."""
+    return list(iter_range(data, start, stop, tables))
+
+
+def extract_document(data, tables=False):
+    """Extract every page of ``data`` (bytes or a file path) in one pool worker, for batches of many documents."""
+    return extract_range(data, 0, page_count(data), tables)
+
+
+def page_ranges(total, workers):
+    # Every task parses the file again, so small documents are not cut into tiny ranges.
+    size = max(MIN_RANGE_PAGES, -(-total // (workers * BATCHES_PER_WORKER)))
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def _extract_stream(data, total, tables):
+    if total < PARALLEL_MIN_PAGES:
+        yield from iter_range(data, 0, total, tables)
+        return
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+    pool = get_pool()
+    futures = [pool.submit(extract_range, f.name, start, stop, tables) for start, stop in page_ranges(total, WORKERS)]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        try:
+            os.remove(f.name)
+        except OSError:
+            pass
+
+
+def hash_key(doc_hash, tables=False):
+    """Document-cache key for the extracted pages of the document hashed ``doc_hash``."""
+    return f"{doc_hash}-{'tables' if tables else 'text'}"
+
+
+def pages_key(data, tables=False):
+    """Document-cache key for the extracted pages of ``data``."""
+    return hash_key(document_hash(data), tables)
+
+
+def iter_pages(data, tables=False):
+    """Yield ``(index, total, text)`` for every page of ``data`` in page order.
+
+    Pages come from the document cache when possible; otherwise they are
+    extracted as a stream and the cache is filled once the last page is done.
+    """
+    cache = get_document_cache()
+    key = pages_key(data, tables)
+    pages = cache.get(key)
+    if pages is not None:
+        for index, text in enumerate(pages):
+            yield index, len(pages), text
+        return
+
+    total = page_count(data)
+    pages = []
+    for index, text in enumerate(_extract_stream(data, total, tables)):
+        pages.append(text)
+        yield index, total, text
+    cache.put(key, pages)
@@ -0,0 +1,60 @@
+"""A small dependency-aware stage executor.
+
+Each stage names the earlier results it needs. Stages whose inputs are all
+available run concurrently on a thread pool, and results are yielded as
+soon as each stage finishes so the caller can render them immediately.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: object
+    inputs: tuple = ()
+
+
+@dataclass
+class StageResult:
+    name: str
+    value: object
+    seconds: float
+
+
+class Pipeline:
+    def __init__(self, stages, max_workers=4):
+        self.stages = list(stages)
+        self.max_workers = max_workers
+        self.timings = {}
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+
+    def _timed(self, stage, args):
+        start = time.perf_counter()
+        value = stage.fn(*args)
+        return value, time.perf_counter() - start
+
+    def run(self, **initial):
+        """Run every stage, yielding a ``StageResult`` as each one completes."""
+        results = dict(initial)
+        pending = list(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for stage in [s for s in pending if all(i in results for i in s.inputs)]:
+                    pending.remove(stage)
+                    args = [results[i] for i in stage.inputs]
+                    running[pool.submit(self._timed, stage, args)] = stage
+                if not running:
+                    missing = {i for s in pending for i in s.inputs if i not in results}
+                    raise ValueError(f"Unsatisfiable stage inputs: {sorted(missing)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    value, seconds = future.result()
+                    results[stage.name] = value
+                    self.timings[stage.name] = seconds
+                    yield StageResult(stage.name, value, seconds)
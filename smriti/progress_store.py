@@ -0,0 +1,174 @@
+"""Memory agent check-ins with incrementally maintained rollups.
+
+Every check-in is appended to ``progress`` and, in the same transaction,
+folded into the user's per-day and per-week rollups and totals row. Pages
+read the totals row and the last few rollup rows, so their cost depends on
+the window shown, not on how many years of check-ins have been logged or
+how many users share the database. Every query is scoped to one user.
+Feedback generated for a user's aggregates is kept per day and keyed by a
+fingerprint of those aggregates, so it is only regenerated when they change.
+"""
+import hashlib
+
+from smriti.storage import DEFAULT_USER, add_column, connection, ensure_schema, transaction
+
+# SQLite expression for the Monday that starts the week of a date.
+WEEK_START = "date({}, 'weekday 0', '-6 days')"
+ROLLUP_TABLES = ("progress_daily", "progress_weekly", "progress_totals")
+
+
+def _create_progress(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS progress(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT,
+            planned_hours INTEGER,
+            worked_hours INTEGER,
+            task TEXT
+        )
+    """)
+
+
+def _add_users(conn):
+    """Give check-ins an owner and rebuild the rollups per user."""
+    add_column(conn, "progress", "user_id", f"TEXT NOT NULL DEFAULT '{DEFAULT_USER}'")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_user_day ON progress (user_id, day)")
+    for table in ROLLUP_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    sums = """
+        entries INTEGER NOT NULL,
+        planned_hours INTEGER NOT NULL,
+        worked_hours INTEGER NOT NULL,
+        backlog INTEGER NOT NULL
+    """
+    # Keyed by user first, so one user's window is a contiguous range of the table.
+    conn.execute(f"""
+        CREATE TABLE progress_daily (
+            user_id TEXT NOT NULL, day TEXT NOT NULL, {sums}, PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TABLE progress_weekly (
+            user_id TEXT NOT NULL, week_start TEXT NOT NULL, {sums}, PRIMARY KEY (user_id, week_start)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"CREATE TABLE progress_totals (user_id TEXT PRIMARY KEY, {sums}) WITHOUT ROWID")
+    rows = """
+        COUNT(*), COALESCE(SUM(planned_hours), 0), COALESCE(SUM(worked_hours), 0),
+        COALESCE(SUM(MAX(planned_hours - worked_hours, 0)), 0)
+        FROM progress
+    """
+    conn.execute(f"INSERT INTO progress_daily SELECT user_id, day, {rows} GROUP BY user_id, day")
+    conn.execute(f"INSERT INTO progress_weekly SELECT user_id, {WEEK_START.format('day')}, {rows} GROUP BY 1, 2")
+    conn.execute(f"INSERT INTO progress_totals SELECT user_id, {rows} GROUP BY user_id")
+
+
+def _create_feedback_cache(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS progress_feedback (
+            user_id TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            day TEXT NOT NULL,
+            feedback TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, fingerprint, day)
+        ) WITHOUT ROWID
+    """)
+
+
+def init_progress_db():
+    ensure_schema("progress", [_create_progress, _add_users, _create_feedback_cache])
+
+
+def _upsert(conn, table, keys, key_sql, key_params, planned, worked, backlog):
+    conn.execute(
+        f"INSERT INTO {table} ({keys}, entries, planned_hours, worked_hours, backlog) "
+        f"VALUES ({key_sql}, 1, ?, ?, ?) "
+        f"ON CONFLICT ({keys}) DO UPDATE SET "
+        "entries = entries + 1, "
+        "planned_hours = planned_hours + excluded.planned_hours, "
+        "worked_hours = worked_hours + excluded.worked_hours, "
+        "backlog = backlog + excluded.backlog",
+        (*key_params, planned, worked, backlog)
+    )
+
+
+def insert_progress(day, planned, worked, task, user_id=DEFAULT_USER):
+    backlog = max(planned - worked, 0)
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO progress (user_id, day, planned_hours, worked_hours, task) VALUES (?, ?, ?, ?, ?)",
+            (user_id, day, planned, worked, task)
+        )
+        _upsert(conn, "progress_daily", "user_id, day", "?, ?", (user_id, day), planned, worked, backlog)
+        _upsert(
+            conn, "progress_weekly", "user_id, week_start", f"?, {WEEK_START.format('?')}", (user_id, day),
+            planned, worked, backlog
+        )
+        _upsert(conn, "progress_totals", "user_id", "?", (user_id,), planned, worked, backlog)
+
+
+def progress_totals(user_id=DEFAULT_USER):
+    """Return ``{entries, planned_hours, worked_hours, backlog}`` over all of a user's check-ins."""
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT entries, planned_hours, worked_hours, backlog FROM progress_totals WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+    return dict(zip(("entries", "planned_hours", "worked_hours", "backlog"), row or (0, 0, 0, 0)))
+
+
+def recent_days(limit, user_id=DEFAULT_USER):
+    """Return the last ``limit`` logged days as ``(day, planned, worked, backlog)``, oldest first."""
+    with connection() as conn:
+        rows = conn.execute(
+            "SELECT day, planned_hours, worked_hours, backlog FROM progress_daily "
+            "WHERE user_id = ? ORDER BY day DESC LIMIT ?",
+            (user_id, limit)
+        ).fetchall()
+    return rows[::-1]
+
+
+def recent_weeks(limit, user_id=DEFAULT_USER):
+    """Return the last ``limit`` logged weeks as ``(week_start, planned, worked, backlog)``, oldest first."""
+    with connection() as conn:
+        rows = conn.execute(
+            "SELECT week_start, planned_hours, worked_hours, backlog FROM progress_weekly "
+            "WHERE user_id = ? ORDER BY week_start DESC LIMIT ?",
+            (user_id, limit)
+        ).fetchall()
+    return rows[::-1]
+
+
+def days_since(since=None, user_id=DEFAULT_USER):
+    """Return a user's daily rollups from ``since`` (ISO date, or all when None), oldest first."""
+    with connection() as conn:
+        return conn.execute(
+            "SELECT day, planned_hours, worked_hours, backlog FROM progress_daily "
+            "WHERE user_id = ? AND day >= ? ORDER BY day",
+            (user_id, since or "")
+        ).fetchall()
+
+
+def summary_fingerprint(summary):
+    return hashlib.sha256(summary.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def latest_feedback(fingerprint, user_id=DEFAULT_USER):
+    """Return ``(day, feedback)`` most recently stored for ``fingerprint``, or ``None``."""
+    with connection() as conn:
+        return conn.execute(
+            "SELECT day, feedback FROM progress_feedback WHERE user_id = ? AND fingerprint = ? "
+            "ORDER BY day DESC LIMIT 1",
+            (user_id, fingerprint)
+        ).fetchone()
+
+
+def store_feedback(fingerprint, day, feedback, user_id=DEFAULT_USER):
+    """Save feedback for ``day`` and drop the user's feedback from earlier days."""
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO progress_feedback (user_id, fingerprint, day, feedback) VALUES (?, ?, ?, ?)",
+            (user_id, fingerprint, day, feedback)
+        )
+        conn.execute("DELETE FROM progress_feedback WHERE user_id = ? AND day < ?", (user_id, day))
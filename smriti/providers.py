@@ -0,0 +1,165 @@
+"""Chat completion backends behind the gateway.
+
+``GroqProvider`` talks to the hosted API over a pooled keep-alive client.
+``FakeProvider`` answers locally and deterministically after a configurable
+delay, so every page can be run, load-tested and profiled without network
+access or an API key, and the app's own overhead can be measured apart from
+model latency. ``create`` returns the reply text, or a generator of text
+pieces when ``stream`` is set, and fills the optional ``usage`` dict with
+the token counts the backend reports.
+"""
+import hashlib
+import random
+import re
+import time
+
+from smriti.llm import read_usage, stream_text
+
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE = 16
+KEEPALIVE_EXPIRY = 120.0
+DEFAULT_TIMEOUT = 60.0
+
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "your", "into", "each",
+    "give", "make", "keep", "more", "must", "only", "have", "what", "which",
+    "based", "below", "following", "using", "create", "generate", "student",
+    "return", "markdown", "table", "syllabus", "text", "question", "answer",
+}
+SECTION_RE = re.compile(r"^\s*[A-Z][\w ]*:\s*$", re.MULTILINE)
+ADVICE = ["Start with examples", "Revise notes after", "Solve two problems", "Make flash cards"]
+
+
+class GroqProvider:
+    name = "groq"
+
+    def __init__(self, api_key):
+        import httpx
+        from groq import Groq
+
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=DEFAULT_TIMEOUT,
+        )
+        # Retries are owned by the scheduler so they respect the shared quota.
+        self.client = Groq(api_key=api_key, http_client=self.http_client, max_retries=0)
+
+    def create(self, messages, model, stream=False, usage=None, **params):
+        response = self.client.chat.completions.create(model=model, messages=messages, stream=stream, **params)
+        if stream:
+            return stream_text(response, usage)
+        read_usage(response.usage, usage)
+        return response.choices[0].message.content
+
+
+def prompt_terms(text, limit=6):
+    """Pick the most frequent content words of a prompt's material.
+
+    Prompts interpolate documents under ``LABEL:`` lines; the longest such
+    section is used so the instructions themselves don't show up as topics.
+    """
+    sections = SECTION_RE.split(text)
+    if len(sections) > 1:
+        text = max(sections[1:], key=len)
+    counts = {}
+    for word in re.findall(r"[A-Za-z][A-Za-z\-]{3,}", text):
+        word = word.lower()
+        if word not in STOPWORDS:
+            counts[word] = counts.get(word, 0) + 1
+    ranked = sorted(counts, key=lambda w: -counts[w])[:limit]
+    return [w.title() for w in ranked] or ["Topic"]
+
+
+class FakeProvider:
+    """Deterministic local stand-in for a hosted model.
+
+    Replies are shaped after what the prompt asks for (markdown tables,
+    ``->`` mind-map lines, ``Score: X/10`` blocks or bullet lists) and are
+    seeded from the prompt, so the same request always gets the same answer.
+    It reports no usage, so callers count tokens themselves.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.5, token_delay=0.01):
+        self.latency = latency
+        self.token_delay = token_delay
+
+    def create(self, messages, model, stream=False, usage=None, **params):
+        text = self.respond(messages)
+        time.sleep(self.latency)
+        if stream:
+            return self._stream(text)
+        return text
+
+    def _stream(self, text):
+        for piece in re.findall(r"\S+\s*|\s+", text):
+            time.sleep(self.token_delay)
+            yield piece
+
+    def respond(self, messages):
+        prompt = messages[-1]["content"]
+        seed = hashlib.sha256("\n".join(m["content"] for m in messages).encode("utf-8")).digest()
+        rng = random.Random(seed)
+        terms = prompt_terms(prompt)
+        lowered = prompt.lower()
+
+        if "->" in prompt or "mind map" in lowered:
+            return self._mind_map(terms)
+        if "score" in lowered and "/10" in prompt:
+            return self._score(terms, rng)
+        if "table" in lowered:
+            return self._table(prompt, terms, rng)
+        return self._bullets(terms, rng)
+
+    def _mind_map(self, terms):
+        root, rest = terms[0], terms[1:] or ["Overview"]
+        lines = [root]
+        for i, term in enumerate(rest):
+            lines.append(f"{root} -> {term}")
+            lines.append(f"{term} -> {term} Basics")
+            if i % 2 == 0:
+                lines.append(f"{term} -> {term} Examples")
+        return "\n".join(lines)
+
+    def _score(self, terms, rng):
+        score = rng.randint(4, 9)
+        return (
+            f"Score: {score}/10\n"
+            "Feedback:\n"
+            f"- Good grasp of {terms[0].lower()}.\n"
+            f"- Add more detail on {terms[-1].lower()}.\n\n"
+            "Motivation:\n"
+            "\"Keep going — every answer makes the next one easier.\""
+        )
+
+    def _table(self, prompt, terms, rng):
+        header = re.search(r"^\s*(\w[\w ]*(?:\|\s*\w[\w ]*)+)\s*$", prompt, re.MULTILINE)
+        columns = [c.strip() for c in header.group(1).split("|")] if header else ["Week", "Topic", "Focus"]
+        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+        rows = []
+        for i, term in enumerate(terms):
+            cells = []
+            for column in columns:
+                name = column.lower()
+                if name in ("day", "week"):
+                    cells.append(days[i % len(days)] if name == "day" else f"Week {i + 1}")
+                elif "slot" in name or "time" in name:
+                    start = rng.randint(8, 17)
+                    cells.append(f"{start}:00-{start + 1}:00")
+                elif "advice" in name or "focus" in name:
+                    cells.append(rng.choice(ADVICE))
+                else:
+                    cells.append(term)
+            rows.append(cells)
+        lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+        lines += ["| " + " | ".join(cells) + " |" for cells in rows]
+        return "\n".join(lines)
+
+    def _bullets(self, terms, rng):
+        verbs = ["Review", "Practise", "Summarise", "Revisit", "Explain"]
+        return "\n".join(f"- {rng.choice(verbs)} {term.lower()}." for term in terms)
@@ -0,0 +1,83 @@
+"""Persistent cache of LLM responses for deterministic prompts.
+
+Responses are keyed by a hash of (model, messages, temperature, max_tokens)
+and stored in SQLite so they survive restarts and are shared by every
+session. Entries expire after a TTL; when the stored text exceeds the byte
+budget, the least recently used entries are evicted.
+"""
+import hashlib
+import json
+import os
+import time
+
+from smriti.storage import ensure_schema, transaction
+
+CACHE_PATH = os.path.join(".cache", "llm_responses.db")
+TTL = 7 * 24 * 3600
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_key(model, messages, temperature=None, max_tokens=None):
+    payload = json.dumps([model, messages, temperature, max_tokens], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, ttl=TTL, max_bytes=MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        ensure_schema("llm_cache", [self._create_table], path)
+
+    @staticmethod
+    def _create_table(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+
+    def get(self, key):
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                response = None
+            elif now - row[1] > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                response = None
+            else:
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                response = row[0]
+        return response
+
+    def put(self, key, response):
+        now = time.time()
+        size = len(response.encode())
+        with transaction(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            if total > self.max_bytes:
+                self._evict(conn, total - self.max_bytes)
+
+    def _evict(self, conn, excess):
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
@@ -0,0 +1,66 @@
+"""Lexical retrieval over note chunks.
+
+The index is built once per document and answers top-k queries with BM25
+scoring, so asking a question no longer re-tokenizes every chunk.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Inverted index (postings, document frequencies, chunk lengths) with BM25 scoring."""
+
+    def __init__(self, chunks=(), k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunks = []
+        self.lengths = []
+        self.postings = {}
+        self.total_length = 0
+        self.add(chunks)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def add(self, chunks):
+        for chunk in chunks:
+            doc_id = len(self.chunks)
+            terms = Counter(tokenize(chunk))
+            for term, tf in terms.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+            length = sum(terms.values())
+            self.chunks.append(chunk)
+            self.lengths.append(length)
+            self.total_length += length
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        n = len(self.chunks)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, question, k=3):
+        """Return up to ``k`` ``(doc_id, score)`` pairs, best first."""
+        if not self.chunks:
+            return []
+        avg_len = self.total_length / len(self.chunks) or 1.0
+        scores = {}
+        for term in set(tokenize(question)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def top_chunks(self, question, k=3):
+        return [self.chunks[doc_id] for doc_id, score in self.search(question, k) if score > 0]
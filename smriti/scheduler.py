@@ -0,0 +1,137 @@
+"""Rate-limit-aware scheduling of LLM requests.
+
+Every request first takes one slot from a requests-per-minute bucket and
+its estimated tokens from a tokens-per-minute bucket. Waiting requests are
+served in priority order (interactive chat before batch generation), and
+transient failures are retried with jittered exponential backoff. A 429
+pauses the whole queue for the server's ``retry-after`` interval.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+
+INTERACTIVE = 0
+BATCH = 1
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+def is_retryable(exc):
+    try:
+        import groq
+    except ImportError:
+        return False
+
+    if isinstance(exc, (groq.APIConnectionError, groq.APITimeoutError)):
+        return True
+    return isinstance(exc, groq.APIStatusError) and exc.status_code in RETRYABLE_STATUS
+
+
+def retry_after(exc):
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    def __init__(self, requests_per_minute, tokens_per_minute, max_retries=4, base_delay=1.0, max_delay=30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self._stats = {"completed": 0, "retries": 0, "failures": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+    def acquire(self, priority=BATCH, tokens=0):
+        """Block until this request may be sent; returns the seconds spent waiting."""
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    if self._queue[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    now = time.monotonic()
+                    delay = max(
+                        self._paused_until - now,
+                        self.requests.wait_time(1, now),
+                        self.tokens.wait_time(tokens, now),
+                    )
+                    if delay <= 0:
+                        self.requests.consume(1)
+                        self.tokens.consume(tokens)
+                        break
+                    self._cond.wait(delay)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self._stats["total_wait"] += waited
+            self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+        return waited
+
+    def pause(self, seconds):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def run(self, fn, priority=BATCH, tokens=0):
+        """Call ``fn`` once it is allowed through, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority, tokens)
+            try:
+                result = fn()
+            except Exception as exc:
+                if attempt == self.max_retries or not is_retryable(exc):
+                    with self._cond:
+                        self._stats["failures"] += 1
+                    raise
+                with self._cond:
+                    self._stats["retries"] += 1
+                delay = retry_after(exc)
+                if delay is not None:
+                    # acquire() holds every queued request until the pause is over.
+                    self.pause(delay)
+                else:
+                    time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+            else:
+                with self._cond:
+                    self._stats["completed"] += 1
+                return result
+
+    def metrics(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queue_depth"] = len(self._queue)
+        served = stats["completed"] + stats["failures"] + stats["retries"]
+        stats["avg_wait"] = stats["total_wait"] / served if served else 0.0
+        return stats
@@ -0,0 +1,88 @@
+"""Process-wide deduplication of identical in-flight requests.
+
+When many sessions fire the same request at once (a class opening the same
+shared syllabus), the first caller becomes the leader and makes the upstream
+call; everyone who joins while it is in flight follows the leader's
+``Flight`` instead of issuing their own. Streamed text is relayed to
+followers as it arrives, so they see the same progressive output.
+"""
+import threading
+
+
+class FlightFailed(Exception):
+    """The leader's call failed or was abandoned before it finished."""
+
+
+class Flight:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._parts = []
+        self._done = False
+        self._error = None
+
+    def publish(self, part):
+        with self._cond:
+            self._parts.append(part)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        """Mark the flight done; only the first call counts."""
+        with self._cond:
+            if self._done:
+                return
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+
+    def stream(self, timeout=None):
+        """Yield the leader's text as it arrives.
+
+        Raises ``FlightFailed`` if the leader fails, and ``TimeoutError`` if
+        nothing new arrives within ``timeout`` seconds.
+        """
+        seen = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: len(self._parts) > seen or self._done, timeout):
+                    raise TimeoutError("No progress from the in-flight request")
+                parts = self._parts[seen:]
+                done, error = self._done, self._error
+            seen += len(parts)
+            yield from parts
+            if done and not parts:
+                if error is not None:
+                    raise FlightFailed(str(error)) from error
+                return
+
+    def result(self, timeout=None):
+        return "".join(self.stream(timeout))
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def join(self, key):
+        """Return ``(flight, leader)``; the leader must call ``leave`` when done."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats["followers"] += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self._stats["leaders"] += 1
+            return flight, True
+
+    def leave(self, key, flight, error=None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(error)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        return stats
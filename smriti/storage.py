@@ -0,0 +1,156 @@
+"""Shared SQLite connections for the app's databases.
+
+The process keeps a small bounded pool of long-lived connections per
+database file instead of opening and closing one per statement. Callers
+borrow one for a block with ``connection()`` or ``transaction()`` and give
+it back afterwards, so Streamlit's per-rerun script threads and the worker
+pools reuse the same tuned connections rather than opening fresh ones.
+Connections run in WAL mode, so readers never block the writer and
+concurrent sessions stop failing with "database is locked";
+``busy_timeout`` covers the remaining writer-writer contention.
+
+Schemas are versioned per owner: ``ensure_schema`` applies an owner's
+migrations that a database has not seen yet, records the new version in
+``schema_versions``, and does so once per process rather than on every
+page load. Several modules share ``memory.db``, so one ``PRAGMA
+user_version`` would not be enough to track them.
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = "memory.db"
+DEFAULT_USER = "default"
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE = 256 * 1024 * 1024
+POOL_SIZE = 8
+POOL_TIMEOUT = 30.0
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # In WAL mode NORMAL only risks the last commits on power loss, never corruption.
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+_pools = {}
+_pools_lock = threading.Lock()
+_schemas = set()
+_schema_lock = threading.Lock()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Up to ``size`` connections to one database, opened on demand and reused by any thread."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=POOL_TIMEOUT):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                opening = True
+            else:
+                opening = False
+        if opening:
+            try:
+                return _connect(self.path)
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"No free connection to {self.path} after {timeout}s") from None
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+
+def get_pool(path=DB_PATH):
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+
+@contextmanager
+def connection(path=DB_PATH):
+    """Borrow a pooled connection to ``path`` for the block."""
+    pool = get_pool(path)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction(path=DB_PATH):
+    """Run the block in one transaction on a pooled connection to ``path``."""
+    with connection(path) as conn:
+        with conn:
+            yield conn
+
+
+def add_column(conn, table, column, definition):
+    """``ALTER TABLE ... ADD COLUMN`` unless ``table`` already has ``column``."""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def ensure_schema(name, migrations, path=DB_PATH):
+    """Bring schema ``name`` in ``path`` up to date by running the migrations it lacks.
+
+    ``migrations`` is the full ordered list of ``fn(conn)`` steps; the
+    position of the last one applied is stored as the schema's version, and
+    pending steps run together in one transaction.
+    """
+    key = (path, name)
+    if key in _schemas:
+        return
+    with _schema_lock:
+        if key in _schemas:
+            return
+        with transaction(path) as conn:
+            # sqlite3 does not open a transaction for DDL on its own; take the
+            # write lock up front so migrations are atomic across processes too.
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS schema_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            row = conn.execute("SELECT version FROM schema_versions WHERE name = ?", (name,)).fetchone()
+            version = row[0] if row else 0
+            for migrate in migrations[version:]:
+                migrate(conn)
+            if len(migrations) > version:
+                conn.execute(
+                    "INSERT OR REPLACE INTO schema_versions (name, version) VALUES (?, ?)",
+                    (name, len(migrations))
+                )
+        _schemas.add(key)
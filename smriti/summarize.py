@@ -0,0 +1,169 @@
+"""Hierarchical (map-reduce) summarization of long notes.
+
+Notes are cut into sections at content-defined boundaries: before
+headings, and after paragraphs whose hash marks a cut point. Sections are
+summarized concurrently on a bounded thread pool, then the partial
+summaries are merged in a reduce tree whose groups are also chosen by
+content hash. Every map and reduce result is cached by the hash of its
+input. An edit therefore only moves the boundaries next to it, and
+re-summarizing a document where one chapter changed only redoes that
+chapter and the merges above it.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from smriti.chunking import PARAGRAPH_RE
+from smriti.tokens import count_tokens
+
+SECTION_TOKENS = 1200
+MAX_HEADING_CHARS = 80
+HEADING_RE = re.compile(
+    r"^(#{1,6}\s|(?i:chapter|unit|module|section|part|lecture)\s+\w|\d+(\.\d+)*\.?\s+[A-Z])"
+)
+
+
+def content_key(kind, parts):
+    digest = hashlib.sha256(kind.encode())
+    for part in parts:
+        digest.update(b"\x00" + part.encode())
+    return digest.hexdigest()
+
+
+def _hash_value(text):
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+
+
+def _is_heading(paragraph):
+    first = paragraph.splitlines()[0]
+    return len(first) <= MAX_HEADING_CHARS and HEADING_RE.match(first) is not None
+
+
+def split_sections(pages, target_tokens=SECTION_TOKENS):
+    """Cut page texts into sections of about ``target_tokens`` tokens.
+
+    A section closes before a heading, or after a paragraph whose hash picks
+    it (more likely for longer paragraphs), once it holds a quarter of the
+    target; it always closes at twice the target. Boundaries depend only on
+    nearby text, never on page numbers or position in the document.
+    """
+    paragraphs = [p.strip() for page in pages for p in PARAGRAPH_RE.split(page) if p.strip()]
+    min_tokens = target_tokens // 4
+    sections, current, size = [], [], 0
+    for paragraph in paragraphs:
+        if current and size >= min_tokens and _is_heading(paragraph):
+            sections.append(current)
+            current, size = [], 0
+        n = count_tokens(paragraph)
+        current.append(paragraph)
+        size += n
+        if size >= target_tokens * 2 or (size >= min_tokens and _hash_value(paragraph) % target_tokens < n):
+            sections.append(current)
+            current, size = [], 0
+    if current:
+        sections.append(current)
+    return ["\n\n".join(section) for section in sections]
+
+
+class MapReduceSummarizer:
+    def __init__(self, summarize, merge, max_workers=4, fanout=4, cache_size=4096):
+        self.summarize_section = summarize
+        self.merge = merge
+        self.fanout = fanout
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarize")
+
+    def cached(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def store(self, key, summary):
+        with self._lock:
+            self._cache[key] = summary
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _run_level(self, jobs, on_progress):
+        """Run ``(key, fn, arg)`` jobs, reusing cached results; returns results in order."""
+        results = [self.cached(key) for key, _, _ in jobs]
+        if on_progress:
+            for _ in range(sum(r is not None for r in results)):
+                on_progress()
+        futures = {
+            self._pool.submit(fn, arg): i
+            for i, (key, fn, arg) in enumerate(jobs)
+            if results[i] is None
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            self.store(jobs[i][0], results[i])
+            if on_progress:
+                on_progress()
+        return results
+
+    def _groups(self, keys):
+        """Split positions of ``keys`` into runs of two or more that end where a key's hash says.
+
+        Groups average ``fanout`` items and never exceed twice that, and an
+        inserted or removed item only regroups its neighbours.
+        """
+        groups, current = [], []
+        for i, key in enumerate(keys):
+            current.append(i)
+            if len(current) >= 2 * self.fanout or (len(current) >= 2 and int(key[:8], 16) % self.fanout == 0):
+                groups.append(current)
+                current = []
+        if current:
+            groups.append(current)
+        return groups
+
+    def partial_summaries(self, sections, on_progress=None):
+        """Summarize ``sections`` and merge upwards until at most ``fanout`` parts remain."""
+        sections = [s for s in sections if s.strip()]
+        keys = [content_key("map", [s]) for s in sections]
+        level = self._run_level(
+            [(key, self.summarize_section, s) for key, s in zip(keys, sections)],
+            on_progress
+        )
+        # Groups follow the sections' keys rather than the summaries, so the
+        # tree's shape is known up front and identical for identical input.
+        while len(level) > self.fanout:
+            groups = self._groups(keys)
+            merged = iter(self._run_level(
+                [(content_key("reduce", parts), self.merge, parts)
+                 for parts in ([level[i] for i in g] for g in groups) if len(parts) > 1],
+                on_progress
+            ))
+            level = [next(merged) if len(g) > 1 else level[g[0]] for g in groups]
+            keys = [content_key("group", [keys[i] for i in g]) for g in groups]
+        return level
+
+    def task_count(self, sections):
+        """Number of map and reduce calls ``partial_summaries`` makes, for progress bars."""
+        keys = [content_key("map", [s]) for s in sections if s.strip()]
+        count = len(keys)
+        while len(keys) > self.fanout:
+            groups = self._groups(keys)
+            count += sum(len(g) > 1 for g in groups)
+            keys = [content_key("group", [keys[i] for i in g]) for g in groups]
+        return count
+
+    def summarize(self, sections, on_progress=None):
+        parts = self.partial_summaries(sections, on_progress)
+        if len(parts) <= 1:
+            return parts[0] if parts else ""
+        key = content_key("reduce", parts)
+        summary = self.cached(key)
+        if summary is None:
+            summary = self.merge(parts)
+            self.store(key, summary)
+        return summary
@@ -0,0 +1,74 @@
+"""Syllabus analyses shared by the Ingestion page and the batch CLI.
+
+Both entry points build byte-identical prompts from the same text, so a
+syllabus pre-processed by ``python -m smriti.batch`` is answered straight
+from the response cache when it is later uploaded on the page.
+"""
+from smriti.gateway import fit_document
+
+SYSTEM = "You are an academic syllabus analysis assistant."
+
+
+def topics_prompt(text):
+    return f"""
+From the syllabus text below:
+- Identify subjects
+- List important topics chapter-wise
+- Present output as a clean markdown table
+
+SYLLABUS:
+{text}
+"""
+
+
+def resources_prompt(text):
+    return f"""
+Based on the following syllabus:
+- Suggest best books
+- Paid & free online courses
+- Trusted YouTube channels (academic only)
+
+SYLLABUS:
+{text}
+"""
+
+
+def tips_prompt(text):
+    return f"""
+Based on the syllabus below:
+- Give subject-wise study tips
+- Explain how each subject helps in placements
+
+SYLLABUS:
+{text}
+"""
+
+
+def plan_prompt(text):
+    return f"""
+Create a WEEK-WISE study plan in a markdown table.
+
+Rules:
+1. Leave 1 week for mid-sem after half syllabus
+2. Leave 1 week for end-sem after full syllabus
+3. Prioritize important topics
+4. Distribute topics evenly
+
+SYLLABUS:
+{text}
+"""
+
+
+# name -> (call site, prompt builder)
+ANALYSES = {
+    "topics": ("ingestion.extract_topics", topics_prompt),
+    "resources": ("ingestion.suggest_resources", resources_prompt),
+    "tips": ("ingestion.give_tips", tips_prompt),
+    "plan": ("ingestion.generate_study_plan", plan_prompt),
+}
+
+
+def analyze(llm, name, text, stream=False):
+    """Run one of ``ANALYSES`` on the syllabus ``text`` through the gateway ``llm``."""
+    site, build = ANALYSES[name]
+    return llm.complete(build(fit_document(text, site)), SYSTEM, site=site, stream=stream)
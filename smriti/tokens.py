@@ -0,0 +1,40 @@
+"""Token counting with tiktoken.
+
+tiktoken fetches its BPE tables on first use; when that is not possible
+(offline machines) a regex word/punctuation split stands in so callers still
+get a close, deterministic estimate.
+"""
+import re
+import threading
+
+ENCODING = "cl100k_base"
+
+_encoding = None
+_lock = threading.Lock()
+
+
+class RegexEncoding:
+    name = "regex"
+    pattern = re.compile(r"\s*\w+|\s*[^\w\s]|\s+")
+
+    def encode(self, text):
+        return self.pattern.findall(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def get_encoding():
+    global _encoding
+    with _lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING)
+            except Exception:
+                _encoding = RegexEncoding()
+        return _encoding
+
+
+def count_tokens(text):
+    return len(get_encoding().encode(text))
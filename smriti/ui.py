@@ -0,0 +1,45 @@
+"""Streamlit helpers shared by the pages."""
+import streamlit as st
+
+from smriti.pdf_extract import iter_pages
+from smriti.storage import DEFAULT_USER
+
+
+def auth_configured():
+    try:
+        return "auth" in st.secrets
+    except FileNotFoundError:
+        return False
+
+
+def current_user():
+    """Return the id that scopes the visitor's progress, feedback and chats.
+
+    With an ``[auth]`` section in ``secrets.toml`` the id comes from the
+    signed-in identity (``st.user``) and the page stops at a login button
+    until the visitor signs in. Without one the app runs single-user and
+    everything is stored under ``DEFAULT_USER``; an id the visitor types
+    in is never trusted.
+    """
+    if not auth_configured():
+        st.sidebar.caption("👤 Single-user mode — configure [auth] in secrets.toml to sign students in.")
+        return DEFAULT_USER
+    if not st.user.get("is_logged_in"):
+        st.info("Sign in to see your progress, feedback and chats.")
+        st.button("🔐 Sign in", on_click=st.login)
+        st.stop()
+    user = st.user.get("email") or st.user.get("sub")
+    st.sidebar.caption(f"👤 Signed in as {user}")
+    st.sidebar.button("Sign out", on_click=st.logout)
+    return user
+
+
+def read_pdf_pages(uploaded_file, tables=False):
+    """Extract an uploaded PDF page by page behind a progress bar."""
+    progress = st.progress(0.0, text="Reading PDF...")
+    pages = []
+    for index, total, text in iter_pages(uploaded_file.getvalue(), tables):
+        pages.append(text)
+        progress.progress((index + 1) / total, text=f"Reading page {index + 1} of {total}")
+    progress.empty()
+    return pages
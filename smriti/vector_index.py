@@ -0,0 +1,64 @@
+"""Dense retrieval over note chunks with sentence-transformers and FAISS.
+
+faiss and sentence-transformers are heavy imports, so they are only loaded
+when an embedding-backed mode is actually used.
+"""
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+FLAT_LIMIT = 20000
+HNSW_NEIGHBOURS = 32
+HNSW_EF_SEARCH = 64
+
+
+def load_encoder(model_name=DEFAULT_MODEL):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def encode(encoder, texts, batch_size=64):
+    import numpy as np
+    vectors = encoder.encode(
+        list(texts),
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return np.ascontiguousarray(vectors, dtype="float32")
+
+
+class DenseIndex:
+    """Cosine-similarity index: exact flat search for small docs, HNSW above ``FLAT_LIMIT``."""
+
+    def __init__(self, encoder, chunks, batch_size=64, flat_limit=FLAT_LIMIT):
+        import faiss
+
+        self.encoder = encoder
+        self.chunks = list(chunks)
+        vectors = encode(encoder, self.chunks, batch_size)
+        dim = vectors.shape[1] if len(vectors) else encoder.get_sentence_embedding_dimension()
+        if len(self.chunks) <= flat_limit:
+            self.index = faiss.IndexFlatIP(dim)
+        else:
+            self.index = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBOURS, faiss.METRIC_INNER_PRODUCT)
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
+        if len(vectors):
+            self.index.add(vectors)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def search(self, question, k=3):
+        """Return up to ``k`` ``(doc_id, cosine)`` pairs, best first."""
+        if not self.chunks:
+            return []
+        scores, ids = self.index.search(encode(self.encoder, [question]), min(k, len(self.chunks)))
+        return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+
+
+def reciprocal_rank_fusion(rankings, k=3, c=60):
+    """Fuse several ``(doc_id, score)`` rankings into one, best first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (c + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]